@@ -1,25 +1,41 @@
 # backend.auth.add_users
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
+from tortoise.exceptions import IntegrityError
 from backend.models.users import User as Model
+from backend.auth.hashing import get_password_hasher
+from backend.auth.user_check import invalidate_user_cache, peek_cached_user, user_write_key
+from backend.core.db_router import remember_write
 from typing import Dict
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def _login_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="User with this login already exists"
+    )
 
 async def create_user(user_data: Dict) -> bool:
-    """Создание нового пользователя с валидацией данных."""
-    if await Model.filter(login=user_data["login"]).exists():
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="User with this login already exists"
+    """
+    Создание нового пользователя одним INSERT.
+    Уникальность логина гарантирует индекс в БД, конфликт превращается в 409.
+    """
+    # Если кеш уже знает этот логин, не тратим время на bcrypt
+    if peek_cached_user(user_data["login"]) is not None:
+        raise _login_conflict()
+
+    hashed_password = await get_password_hasher().hash(user_data["password"][:72])
+    try:
+        await Model.create(
+            login=user_data["login"],
+            role=user_data["role"],
+            hashed_password=hashed_password
         )
+    except IntegrityError:
+        raise _login_conflict()
 
-    hashed_password = pwd_context.hash(user_data["password"][:72])
-    await Model.create(
-        login=user_data["login"],
-        role=user_data["role"],
-        hashed_password=hashed_password
-    )
+    # Сбрасываем отрицательную запись кеша, иначе новый логин "не найдётся" до истечения TTL,
+    # и какое-то время читаем этот логин с основного сервера, пока запись доходит до реплик
+    invalidate_user_cache(user_data["login"])
+    await remember_write(user_write_key(user_data["login"]))
     return True
 
 async def handle_create_user_request(user_data: Dict) -> dict:
@@ -0,0 +1,237 @@
+# backend.auth.bulk_import
+import csv
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator
+from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
+from backend.models.users import User as Model
+from backend.models.users_roles import UserRole
+from backend.auth.user_check import invalidate_user_cache, user_write_key
+from backend.core.db_router import remember_writes
+from backend.auth.hashing import PasswordHasher, get_password_hasher
+
+logger = logging.getLogger(__name__)
+
+# Конфигурация массового импорта
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE") or 1000)
+# Процессов хеширования у CLI; HTTP-импорт использует общий пул PASSWORD_HASHER_*
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS") or os.cpu_count() or 1)
+# Одновременных импортов через HTTP на воркер
+BULK_IMPORT_MAX_CONCURRENT = int(os.getenv("BULK_IMPORT_MAX_CONCURRENT") or 1)
+
+SUPPORTED_FORMATS = ("ndjson", "csv")
+LOGIN_MAX_LENGTH = Model._meta.fields_map["login"].max_length
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    created: int = 0
+    duplicates: list[dict] = field(default_factory=list)
+    errors: list[dict] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+        }
+
+
+@dataclass
+class _Row:
+    line: int
+    login: str
+    password: str
+    role: str
+    hashed_password: str = ""
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Разбивает поток байтов на строки, не держа в памяти весь файл."""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_number += 1
+            yield line_number, raw.decode("utf-8-sig" if line_number == 1 else "utf-8").rstrip("\r")
+    if buffer:
+        yield line_number + 1, buffer.decode("utf-8-sig" if line_number == 0 else "utf-8").rstrip("\r")
+
+
+def _parse_row(line: int, data: dict) -> _Row:
+    login = data.get("login")
+    password = data.get("password")
+    role = data.get("role") or UserRole.user.value
+
+    if not isinstance(login, str) or not login or len(login) > LOGIN_MAX_LENGTH:
+        raise ValueError("Недопустимый логин")
+    if not isinstance(password, str) or not password:
+        raise ValueError("Пароль не указан")
+    try:
+        role = UserRole(role).value
+    except ValueError:
+        raise ValueError("Недопустимая роль")
+    return _Row(line=line, login=login, password=password, role=role)
+
+
+class _LineFeed:
+    """Источник строк для одного csv.reader: строки подкладываются по мере чтения потока."""
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _iter_records(lines: AsyncIterator[tuple[int, str]], fmt: str) -> AsyncIterator[tuple[int, dict | Exception]]:
+    header = None
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    # Строка, с которой начинается текущая запись CSV, и число кавычек в ней
+    record_line = None
+    quotes = 0
+    async for line_number, line in lines:
+        if fmt == "csv":
+            if record_line is None:
+                if not line.strip():
+                    continue
+                record_line = line_number
+            feed.lines.append(line + "\n")
+            quotes += line.count('"')
+            if quotes % 2:
+                # Поле в кавычках содержит перевод строки: запись продолжается на следующей строке
+                continue
+            line_number, record_line, quotes = record_line, None, 0
+        elif not line.strip():
+            continue
+        try:
+            if fmt == "ndjson":
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Ожидался JSON-объект")
+            else:
+                values = next(reader)
+                if header is None:
+                    header = [name.strip() for name in values]
+                    continue
+                record = dict(zip(header, values))
+        except (ValueError, csv.Error) as e:
+            yield line_number, ValueError(str(e))
+            continue
+        yield line_number, record
+
+    if record_line is not None:
+        yield record_line, ValueError("Незакрытая кавычка в CSV")
+
+
+async def _insert_batch(rows: list[_Row], report: ImportReport):
+    objects = [
+        Model(login=row.login, role=row.role, hashed_password=row.hashed_password)
+        for row in rows
+    ]
+    try:
+        async with in_transaction(Model._meta.default_connection) as connection:
+            await Model.bulk_create(objects, using_db=connection)
+        created = rows
+    except IntegrityError:
+        # Кто-то успел создать часть логинов параллельно: разбираем пачку построчно
+        created = []
+        for row in rows:
+            try:
+                await Model.create(login=row.login, role=row.role, hashed_password=row.hashed_password)
+                created.append(row)
+            except IntegrityError:
+                report.duplicates.append({"line": row.line, "login": row.login})
+
+    for row in created:
+        invalidate_user_cache(row.login)
+    await remember_writes([user_write_key(row.login) for row in created])
+    report.created += len(created)
+
+
+async def _process_batch(rows: list[_Row], seen: set[str], hasher: PasswordHasher, report: ImportReport):
+    # Дубликаты внутри самого файла
+    unique_rows = []
+    for row in rows:
+        if row.login in seen:
+            report.duplicates.append({"line": row.line, "login": row.login})
+        else:
+            seen.add(row.login)
+            unique_rows.append(row)
+
+    # Дубликаты в БД проверяем одним запросом на пачку и не тратим на них bcrypt
+    existing = set(await Model.filter(
+        login__in=[row.login for row in unique_rows]
+    ).values_list("login", flat=True))
+    new_rows = []
+    for row in unique_rows:
+        if row.login in existing:
+            report.duplicates.append({"line": row.line, "login": row.login})
+        else:
+            new_rows.append(row)
+    if not new_rows:
+        return
+
+    hashed_passwords = await hasher.hash_many([row.password for row in new_rows])
+    for row, hashed_password in zip(new_rows, hashed_passwords):
+        row.hashed_password = hashed_password
+
+    await _insert_batch(new_rows, report)
+
+
+async def import_users(chunks: AsyncIterable[bytes], fmt: str,
+                       batch_size: int = BULK_IMPORT_BATCH_SIZE,
+                       hasher: PasswordHasher | None = None) -> ImportReport:
+    """
+    Импортирует пользователей из потока NDJSON/CSV.
+    Пароли хешируются небольшими задачами в пуле hasher (по умолчанию общий пул приложения,
+    из которого импорт занимает не больше bulk_workers воркеров), вставка идёт пачками,
+    дубликаты и ошибки валидации попадают в отчёт построчно.
+    """
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    hasher = hasher or get_password_hasher()
+    # CLI запускается без lifespan, поэтому стоимость bcrypt подбираем здесь
+    await hasher.calibrate()
+
+    report = ImportReport()
+    seen: set[str] = set()
+    batch: list[_Row] = []
+    async for line_number, record in _iter_records(iter_lines(chunks), fmt):
+        report.total += 1
+        try:
+            if isinstance(record, Exception):
+                raise record
+            batch.append(_parse_row(line_number, record))
+        except ValueError as e:
+            report.errors.append({"line": line_number, "error": str(e)})
+            continue
+
+        if len(batch) >= batch_size:
+            await _process_batch(batch, seen, hasher, report)
+            logger.info(f"Bulk import: {report.total} rows processed, {report.created} created")
+            batch = []
+
+    if batch:
+        await _process_batch(batch, seen, hasher, report)
+
+    logger.info(
+        f"Bulk import finished: total={report.total}, created={report.created}, "
+        f"duplicates={len(report.duplicates)}, errors={len(report.errors)}"
+    )
+    return report
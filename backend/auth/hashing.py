@@ -0,0 +1,244 @@
+# backend.auth.hashing
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from fastapi import HTTPException, status
+from backend.auth.user_check import get_password_hash, get_hash_rounds, verify_password
+from backend.utils.redis_client import get_redis
+from backend.utils.timing import span
+
+logger = logging.getLogger(__name__)
+
+# Конфигурация пула хеширования
+HASHER_EXECUTOR = os.getenv("PASSWORD_HASHER_EXECUTOR") or "thread"  # thread | process
+HASHER_WORKERS = int(os.getenv("PASSWORD_HASHER_WORKERS") or os.cpu_count() or 1)
+HASHER_MAX_QUEUE = int(os.getenv("PASSWORD_HASHER_MAX_QUEUE") or 64)
+# Паролей в одной задаче hash_many: массовый импорт занимает воркер не дольше нескольких хешей
+HASH_MANY_CHUNK_SIZE = 8
+
+# Политика стоимости bcrypt: BCRYPT_ROUNDS фиксирует стоимость и отключает калибровку
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS") or 250)
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS") or 10)
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS") or 14)
+DEFAULT_ROUNDS = 12
+CALIBRATION_SAMPLES = 3
+# Результат калибровки общий для всех воркеров и перезапусков: первый записавший его
+# в Redis задаёт стоимость остальным, пока ключ не истечёт
+BCRYPT_CALIBRATION_KEY = "password_hasher:bcrypt_rounds"
+BCRYPT_CALIBRATION_TTL_SECONDS = int(os.getenv("BCRYPT_CALIBRATION_TTL_SECONDS") or 86400)
+
+
+async def _load_shared_rounds() -> int | None:
+    try:
+        value = await get_redis().get(BCRYPT_CALIBRATION_KEY)
+    except Exception as e:
+        logger.warning(f"Shared bcrypt cost is unavailable, calibrating locally: {e}")
+        return None
+    return int(value) if value is not None else None
+
+
+async def _store_shared_rounds(rounds: int) -> int:
+    """Сохраняет стоимость, если её ещё нет, и возвращает ту, что в итоге в Redis."""
+    try:
+        await get_redis().set(BCRYPT_CALIBRATION_KEY, rounds, nx=True, ex=BCRYPT_CALIBRATION_TTL_SECONDS)
+        shared = await _load_shared_rounds()
+    except Exception as e:
+        logger.warning(f"Failed to share bcrypt cost: {e}")
+        return rounds
+    return shared if shared is not None else rounds
+
+
+def _hash_chunk(passwords: list[str], rounds: int) -> list[str]:
+    """Выполняется в пуле: хеширует пачку паролей за одну задачу."""
+    return [get_password_hash(password[:72], rounds) for password in passwords]
+
+
+def _measure_hash_ms(rounds: int) -> float:
+    """Выполняется в пуле: лучшее время из нескольких хеширований с заданной стоимостью."""
+    best = float("inf")
+    for _ in range(CALIBRATION_SAMPLES):
+        start = time.perf_counter()
+        get_password_hash("calibration-password", rounds)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt в отдельном пуле, чтобы не блокировать event loop.
+    Количество ожидающих задач ограничено: при переполнении очереди запрос
+    отклоняется с 503, а не копится в памяти.
+    Стоимость bcrypt подбирается при старте под BCRYPT_TARGET_MS и делится между воркерами через Redis.
+    Массовое хеширование (hash_many) занимает не больше bulk_workers воркеров,
+    по умолчанию на один меньше пула, чтобы логины не ждали окончания импорта.
+    """
+
+    def __init__(self, executor_kind: str, workers: int, max_queue: int,
+                 rounds: int | None = None, bulk_workers: int | None = None):
+        if executor_kind not in ("thread", "process"):
+            raise ValueError(f"Invalid PASSWORD_HASHER_EXECUTOR value: {executor_kind}")
+        self._executor_kind = executor_kind
+        self._workers = max(1, workers)
+        self._max_pending = self._workers + max(0, max_queue)
+        self._bulk_workers = max(1, self._workers - 1 if bulk_workers is None else bulk_workers)
+        self._bulk_slots = asyncio.Semaphore(self._bulk_workers)
+        self._executor: Executor | None = None
+        self._fixed_rounds = rounds is not None
+        self._calibrated = False
+        self.rounds = rounds or DEFAULT_ROUNDS
+
+        self._pending = 0
+        self._max_pending_seen = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._executor_kind == "process":
+                # spawn: fork многопоточного процесса (писатель логов, пулы потоков) может зависнуть
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers,
+                    thread_name_prefix="password-hasher"
+                )
+            logger.info(f"Password hasher started: {self._executor_kind} pool, {self._workers} workers")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._pending >= self._max_pending:
+            self._rejected += 1
+            logger.warning(f"Password hasher queue is full ({self._pending} pending), request rejected")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервер перегружен, повторите попытку позже",
+                headers={"Retry-After": "1"}
+            )
+
+        self._pending += 1
+        self._submitted += 1
+        self._max_pending_seen = max(self._max_pending_seen, self._pending)
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+            self._total_seconds += time.perf_counter() - start
+
+    async def calibrate(self):
+        """
+        Подбирает максимальную стоимость, укладывающуюся в BCRYPT_TARGET_MS.
+        Если другой воркер уже откалибровал её, берётся общее значение из Redis.
+        """
+        if self._fixed_rounds or self._calibrated:
+            return
+
+        shared = await _load_shared_rounds()
+        if shared is not None:
+            self.rounds = shared
+            self._calibrated = True
+            logger.info(f"bcrypt cost {shared} taken from the shared calibration")
+            return
+
+        loop = asyncio.get_running_loop()
+        # Первый вызов прогревает пул (в режиме process это старт процессов)
+        await loop.run_in_executor(self._get_executor(), _measure_hash_ms, 4)
+        base_ms = await loop.run_in_executor(self._get_executor(), _measure_hash_ms, BCRYPT_MIN_ROUNDS)
+
+        # Каждый следующий раунд удваивает время хеширования
+        rounds = BCRYPT_MIN_ROUNDS
+        while rounds < BCRYPT_MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - BCRYPT_MIN_ROUNDS) <= BCRYPT_TARGET_MS:
+            rounds += 1
+        expected_ms = base_ms * 2 ** (rounds - BCRYPT_MIN_ROUNDS)
+        if expected_ms > BCRYPT_TARGET_MS:
+            logger.warning(f"bcrypt cost {rounds} takes ~{expected_ms:.0f}ms, above target {BCRYPT_TARGET_MS:.0f}ms")
+
+        self.rounds = await _store_shared_rounds(rounds)
+        self._calibrated = True
+        logger.info(f"bcrypt calibrated: cost {rounds}, ~{expected_ms:.0f}ms per hash (target {BCRYPT_TARGET_MS:.0f}ms), "
+                    f"using cost {self.rounds}")
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        Только повышение стоимости: хеш дороже текущей не перехешируется,
+        иначе воркеры с разной калибровкой гоняли бы пароль между стоимостями.
+        """
+        rounds = get_hash_rounds(hashed_password)
+        return rounds is not None and rounds < self.rounds
+
+    async def hash(self, password: str) -> str:
+        with span("bcrypt"):
+            return await self._run(get_password_hash, password, self.rounds)
+
+    async def _hash_chunk_bulk(self, chunk: list[str]) -> list[str]:
+        async with self._bulk_slots:
+            return await self._run(_hash_chunk, chunk, self.rounds)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Хеширует пароли задачами по HASH_MANY_CHUNK_SIZE, одновременно выполняется
+        не больше bulk_workers задач. Задачи проходят через ту же очередь, что и логины:
+        при её переполнении - 503, оставшиеся задачи пачки отменяются.
+        """
+        tasks = [
+            asyncio.ensure_future(self._hash_chunk_bulk(passwords[i:i + HASH_MANY_CHUNK_SIZE]))
+            for i in range(0, len(passwords), HASH_MANY_CHUNK_SIZE)
+        ]
+        try:
+            hashed_chunks = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return [hashed for chunk in hashed_chunks for hashed in chunk]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        with span("bcrypt"):
+            return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        finished = self._completed + self._failed
+        return {
+            "executor": self._executor_kind,
+            "rounds": self.rounds,
+            "workers": self._workers,
+            "bulk_workers": self._bulk_workers,
+            "pending": self._pending,
+            "queue_depth": max(0, self._pending - self._workers),
+            "max_pending": self._max_pending,
+            "max_pending_seen": self._max_pending_seen,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_ms": round(self._total_seconds / finished * 1000, 2) if finished else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache
+def get_password_hasher() -> PasswordHasher:
+    return PasswordHasher(
+        HASHER_EXECUTOR, HASHER_WORKERS, HASHER_MAX_QUEUE,
+        int(BCRYPT_ROUNDS) if BCRYPT_ROUNDS else None
+    )
@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+
+# Загрузка .env файла
+from dotenv import load_dotenv
+load_dotenv()
+
+from backend.auth.bulk_import import import_users, SUPPORTED_FORMATS, BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_WORKERS
+from backend.auth.hashing import BCRYPT_ROUNDS, PasswordHasher
+from backend.lifespan import init_db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+async def read_file(path: Path):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+async def run(args: argparse.Namespace):
+    path = Path(args.path)
+    fmt = args.format or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+
+    logger.debug("Инициализация базы данных")
+    await init_db()
+
+    # Отдельный пул процессов: CLI не делит CPU с обработкой запросов
+    hasher = PasswordHasher("process", args.workers, args.workers, int(BCRYPT_ROUNDS) if BCRYPT_ROUNDS else None,
+                            bulk_workers=args.workers)
+    try:
+        report = await import_users(read_file(path), fmt, args.batch_size, hasher)
+        logger.info(
+            f"Импорт завершён: всего {report.total}, создано {report.created}, "
+            f"дубликатов {len(report.duplicates)}, ошибок {len(report.errors)}"
+        )
+        if args.report:
+            Path(args.report).write_text(json.dumps(report.as_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+            logger.info(f"Отчёт сохранён в '{args.report}'")
+
+    finally:
+        hasher.shutdown()
+        logger.debug("Закрытие соединений с базой данных")
+        from tortoise import Tortoise
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Массовый импорт пользователей из NDJSON/CSV")
+    parser.add_argument("path", help="Путь к файлу с пользователями")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="Формат файла (по умолчанию по расширению)")
+    parser.add_argument("--batch-size", type=int, default=BULK_IMPORT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=BULK_IMPORT_WORKERS, help="Процессов для хеширования")
+    parser.add_argument("--report", help="Сохранить полный отчёт в JSON-файл")
+    asyncio.run(run(parser.parse_args()))
@@ -1,34 +1,68 @@
 # backend.auth.jwt_token
-from datetime import datetime, timedelta, timezone
+import hashlib
 import os
+import time
 from jose import jwt, JWTError
 from fastapi import HTTPException, status
 from pydantic import BaseModel
+from backend.utils.ttl_cache import TTLCache, MISSING
 
 # Загрузка настроек из .env (конфигурация проекта)
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+ALGORITHM = os.getenv("JWT_ALGORITHM") or "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES") or 60)
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("JWT_CACHE_MAX_SIZE") or 10000)
+
+# digest токена -> TokenData; запись живёт ровно до exp токена
+_token_cache = TTLCache(TOKEN_CACHE_MAX_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 
 class TokenData(BaseModel):
     username: str | None = None
     role: str | None = None
 
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Неверные учетные данные",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
 def decode_token(token: str) -> TokenData:
     """
     Декодирует токен и возвращает данные в виде модели TokenData.
+    Уже проверенные токены берутся из кеша по sha256 от токена.
     Если токен истёк или некорректен — выбрасывается HTTPException.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-    )
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    cached = _token_cache.get(digest)
+    if cached is not MISSING:
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        role: str = payload.get("role")
-        if username is None or role is None:
-            raise credentials_exception
-        return TokenData(username=username, role=role)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    username = payload.get("sub")
+    role = payload.get("role")
+    if not username or not role:
+        raise _credentials_exception()
+
+    token_data = TokenData(username=username, role=role)
+    expires_at = payload.get("exp")
+    # Токены без exp не кешируем: для них нет момента гарантированной инвалидации
+    if isinstance(expires_at, (int, float)):
+        _token_cache.set(digest, token_data, ttl_seconds=expires_at - time.time())
+    return token_data
+
+
+def clear_token_cache():
+    """Сбрасывает кеш, например при смене JWT_SECRET_KEY."""
+    _token_cache.clear()
+
+
+def get_token_cache_stats() -> dict:
+    return _token_cache.stats()
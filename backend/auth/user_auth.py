@@ -1,24 +1,27 @@
 # backend.auth.user_auth
-from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
 import os
-from jose import jwt, JWTError
+from datetime import datetime, timedelta, timezone
+from jose import jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
 from backend.models.users import User as Model
-from backend.auth.user_check import get_user_by_login
-
-# Конфигурация токена
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+from backend.auth.user_check import get_user_by_login, invalidate_user_cache
+from backend.auth.hashing import get_password_hasher
+from backend.auth.jwt_token import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, TokenData, decode_token
+)
 
+logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# Роль, которой доступны административные эндпоинты (должна быть одной из ALLOWED_ROLES)
+ADMIN_ROLE = os.getenv("ADMIN_ROLE") or "admin"
 
-class TokenData(BaseModel):
-    username: str | None = None
-    role: str | None = None
+# Ссылки на фоновые задачи перехеширования, чтобы их не собрал GC
+_rehash_tasks: set[asyncio.Task] = set()
+_rehash_in_progress: set[int] = set()
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -35,20 +38,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 
 
 async def get_token_data(token: str = Depends(oauth2_scheme)) -> TokenData:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Неверные учетные данные",
-        headers={"WWW-Authenticate": "Bearer"}
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        role = payload.get("role")
-        if not username or not role:
-            raise credentials_exception
-        return TokenData(username=username, role=role)
-    except JWTError:
-        raise credentials_exception
+    return decode_token(token)
 
 
 async def get_current_user(token_data: TokenData = Depends(get_token_data)) -> Model:
@@ -62,6 +52,16 @@ async def get_current_user(token_data: TokenData = Depends(get_token_data)) -> M
     return user
 
 
+async def get_current_admin(user: Model = Depends(get_current_user)) -> Model:
+    role = getattr(user.role, "value", user.role)
+    if role != ADMIN_ROLE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав"
+        )
+    return user
+
+
 async def authenticate_user(login: str, password: str) -> Model:
     user = await get_user_by_login(login)
     if not user:
@@ -71,12 +71,34 @@ async def authenticate_user(login: str, password: str) -> Model:
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    from backend.auth.user_check import verify_password
-    if not verify_password(password, user.hashed_password):
+    if not await get_password_hasher().verify(password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный пароль",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    return user
\ No newline at end of file
+    if get_password_hasher().needs_rehash(user.hashed_password) and user.id not in _rehash_in_progress:
+        _rehash_in_progress.add(user.id)
+        task = asyncio.create_task(_rehash_password(user, password))
+        _rehash_tasks.add(task)
+        task.add_done_callback(_rehash_tasks.discard)
+
+    return user
+
+
+async def _rehash_password(user: Model, password: str):
+    """Перехеширует пароль с текущей стоимостью bcrypt, не задерживая ответ на логин."""
+    try:
+        hashed_password = await get_password_hasher().hash(password[:72])
+        # Условие на старый хеш не даёт затереть пароль, сменённый параллельно
+        updated = await Model.filter(id=user.id, hashed_password=user.hashed_password).update(
+            hashed_password=hashed_password
+        )
+        if updated:
+            invalidate_user_cache(user.login)
+            logger.info(f"Password hash for user {user.login} upgraded to cost {get_password_hasher().rounds}")
+    except Exception as e:
+        logger.warning(f"Password rehash failed for user {user.login}: {e}")
+    finally:
+        _rehash_in_progress.discard(user.id)
\ No newline at end of file
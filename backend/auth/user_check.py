@@ -1,10 +1,84 @@
 # backend.auth.user_check
+import asyncio
+import os
 import bcrypt
+from contextlib import nullcontext
 from typing import Optional
+from backend.core.db_router import primary_reads, reads_from_replicas, written_recently, written_recently_shared
 from backend.models.users import User as Model
+from backend.utils.ttl_cache import TTLCache, MISSING
+
+# Конфигурация кеша пользователей (TTL = 0 отключает соответствующий тип записей)
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE") or 10000)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS") or 60)
+USER_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("USER_CACHE_NEGATIVE_TTL_SECONDS") or 5)
+
+# login -> User (или None для несуществующих логинов)
+_user_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+# Запросы к БД, которые уже выполняются, чтобы одновременные промахи не дублировали SELECT
+_inflight: dict[str, asyncio.Future] = {}
+_db_queries = 0
+
 
 async def get_user_by_login(login: str) -> Optional[Model]:
-    return await Model.filter(login=login).first()
+    global _db_queries
+    cached = _user_cache.get(login)
+    if cached is not MISSING:
+        return cached
+
+    pending = _inflight.get(login)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[login] = future
+    try:
+        _db_queries += 1
+        # Только что созданный пользователь может ещё не дойти до реплики
+        key = user_write_key(login)
+        recent = written_recently(key)
+        with primary_reads() if recent else nullcontext():
+            user = await Model.filter(login=login).first()
+        # Промах реплики перепроверяем на основном сервере, только если логин мог создать
+        # другой воркер: несуществующие логины (перебор) не нагружают основной сервер
+        if user is None and not recent and reads_from_replicas(Model) and await written_recently_shared(key):
+            with primary_reads():
+                user = await Model.filter(login=login).first()
+        if user is None:
+            _user_cache.set(login, None, USER_CACHE_NEGATIVE_TTL_SECONDS)
+        else:
+            _user_cache.set(login, user)
+        future.set_result(user)
+        return user
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Исключение пробрасывается вызывающему, ожидающие получат его через future
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(login, None)
+
+
+def user_write_key(login: str) -> str:
+    return f"users:{login}"
+
+
+def peek_cached_user(login: str) -> Optional[Model]:
+    """Возвращает пользователя из кеша без обращения к БД (None, если записи нет)."""
+    cached = _user_cache.peek(login)
+    return None if cached is MISSING else cached
+
+
+def invalidate_user_cache(login: str):
+    _user_cache.invalidate(login)
+
+
+def get_user_cache_stats() -> dict:
+    return {**_user_cache.stats(), "db_queries": _db_queries}
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
@@ -14,6 +88,13 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         # Если произойдёт ошибка, то пароли не совпадают
         return False
 
-def get_password_hash(password: str) -> str:
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+def get_password_hash(password: str, rounds: int = 12) -> str:
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds))
     return hashed.decode('utf-8')
+
+def get_hash_rounds(hashed_password: str) -> Optional[int]:
+    """Стоимость bcrypt из хеша вида $2b$12$..."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
@@ -0,0 +1,139 @@
+# backend.core.db_client
+"""
+Движок Tortoise на базе asyncpg с замером запросов для Server-Timing
+и статистикой пула (ожидающие, время получения соединения).
+Подключается в DATABASES_CONFIG через "engine": "backend.core.db_client".
+"""
+import time
+from tortoise.backends.asyncpg.client import AsyncpgDBClient, TransactionWrapper
+from tortoise.backends.base.client import NestedTransactionContext, PoolConnectionWrapper, TransactionContextPooled
+from tortoise.connection import connections as context_connections
+from backend.utils.metrics import Histogram
+from backend.utils.timing import span
+
+DB_POOL_ACQUIRE_SECONDS = Histogram(
+    "db_pool_acquire_seconds", "Time spent waiting for a database pool connection", ("connection",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+# Клиенты с созданным пулом: имя соединения -> клиент
+_clients: dict[str, "TimedAsyncpgDBClient"] = {}
+
+
+class PoolStats:
+    """Счётчики получения соединений из пула одного клиента."""
+
+    __slots__ = ("waiters", "acquired", "acquire_seconds", "max_acquire_seconds", "histogram")
+
+    def __init__(self, connection_name: str):
+        self.waiters = 0
+        self.acquired = 0
+        self.acquire_seconds = 0.0
+        self.max_acquire_seconds = 0.0
+        self.histogram = DB_POOL_ACQUIRE_SECONDS.labels(connection_name)
+
+    async def acquire(self, pool):
+        self.waiters += 1
+        start = time.perf_counter()
+        try:
+            return await pool.acquire()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.waiters -= 1
+            self.acquired += 1
+            self.acquire_seconds += elapsed
+            if elapsed > self.max_acquire_seconds:
+                self.max_acquire_seconds = elapsed
+            self.histogram.observe(elapsed)
+
+
+class _TimedQueries:
+    async def execute_insert(self, query: str, values: list):
+        with span("db"):
+            return await super().execute_insert(query, values)
+
+    async def execute_many(self, query: str, values: list) -> None:
+        with span("db"):
+            return await super().execute_many(query, values)
+
+    async def execute_query(self, query: str, values: list | None = None):
+        with span("db"):
+            return await super().execute_query(query, values)
+
+    async def execute_query_dict(self, query: str, values: list | None = None) -> list[dict]:
+        with span("db"):
+            return await super().execute_query_dict(query, values)
+
+    async def execute_script(self, query: str) -> None:
+        with span("db"):
+            return await super().execute_script(query)
+
+
+class TimedPoolConnectionWrapper(PoolConnectionWrapper):
+    __slots__ = ()
+
+    async def __aenter__(self):
+        await self.ensure_connection()
+        self.connection = await self.client.pool_stats.acquire(self.client._pool)
+        return self.connection
+
+
+class TimedTransactionContextPooled(TransactionContextPooled):
+    __slots__ = ()
+
+    async def __aenter__(self):
+        await self.ensure_connection()
+        self.token = context_connections.set(self.connection_name, self.client)
+        parent = self.client._parent
+        self.client._connection = await parent.pool_stats.acquire(parent._pool)
+        await self.client.begin()
+        return self.client
+
+
+class TimedTransactionWrapper(_TimedQueries, TransactionWrapper):
+    def _in_transaction(self):
+        return NestedTransactionContext(TimedTransactionWrapper(self))
+
+
+class TimedAsyncpgDBClient(_TimedQueries, AsyncpgDBClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_stats = PoolStats(self.connection_name)
+
+    async def create_connection(self, with_db: bool) -> None:
+        await super().create_connection(with_db)
+        _clients[self.connection_name] = self
+
+    async def _close(self) -> None:
+        _clients.pop(self.connection_name, None)
+        await super()._close()
+
+    def acquire_connection(self):
+        return TimedPoolConnectionWrapper(self, self._pool_init_lock)
+
+    def _in_transaction(self):
+        return TimedTransactionContextPooled(TimedTransactionWrapper(self), self._pool_init_lock)
+
+    def pool_stats_dict(self) -> dict:
+        pool, stats = self._pool, self.pool_stats
+        size = pool.get_size() if pool is not None else 0
+        idle = pool.get_idle_size() if pool is not None else 0
+        return {
+            "min_size": self.pool_minsize,
+            "max_size": self.pool_maxsize,
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "waiters": stats.waiters,
+            "acquired": stats.acquired,
+            "acquire_ms_avg": round(stats.acquire_seconds / stats.acquired * 1000, 3) if stats.acquired else 0.0,
+            "acquire_ms_max": round(stats.max_acquire_seconds * 1000, 3),
+        }
+
+
+def get_db_pool_stats() -> dict:
+    """Состояние пулов соединений по имени соединения (для /health и /metrics)."""
+    return {name: client.pool_stats_dict() for name, client in list(_clients.items())}
+
+
+client_class = TimedAsyncpgDBClient
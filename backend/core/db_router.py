@@ -0,0 +1,221 @@
+# backend.core.db_router
+"""
+Чтение с реплик PostgreSQL: роутер Tortoise отправляет запросы на чтение
+на исправные реплики по кругу, запись и транзакции остаются на основном сервере.
+Подключается в конфиг Tortoise через "routers": ["backend.core.db_router.ReplicaRouter"].
+
+Проверка на двух локальных PostgreSQL (второй играет роль реплики, репликация не нужна):
+    docker run -d -p 5432:5432 -e POSTGRES_PASSWORD=pass -e POSTGRES_DB=users postgres:16
+    docker run -d -p 5433:5432 -e POSTGRES_PASSWORD=pass -e POSTGRES_DB=users postgres:16
+    POSTGRES_PORT=5432 POSTGRES_REPLICA_HOSTS=localhost:5433, таблицу users на втором сервере
+    создаёт один запуск приложения с POSTGRES_PORT=5433.
+Пользователь, созданный через /api/create_user, входит сразу: в окне
+POSTGRES_READ_YOUR_WRITES_SECONDS создавший его воркер читает логин с основного сервера,
+а остальные воркеры узнают о записи по отметке в Redis и перепроверяют там промах "реплики". Чтения пользователей из второго
+экземпляра видны по счётчику reads в db_replicas (/api/health/details); остановка
+второго контейнера убирает его из ротации при следующей проверке.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from tortoise.backends.base.client import TransactionalDBClient
+from tortoise.connection import connections
+from backend.utils.redis_client import get_redis, redis_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Реплики для всех баз: "host[:port],host[:port]"; запись DATABASES_CONFIG может задать свои ключом "replicas"
+POSTGRES_REPLICA_HOSTS = os.getenv("POSTGRES_REPLICA_HOSTS") or ""
+REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("POSTGRES_REPLICA_CHECK_INTERVAL_SECONDS") or 5)
+REPLICA_CHECK_TIMEOUT_SECONDS = float(os.getenv("POSTGRES_REPLICA_CHECK_TIMEOUT_SECONDS") or 1)
+# Сколько секунд после записи чтения той же сущности идут на основной сервер (отставание реплик)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("POSTGRES_READ_YOUR_WRITES_SECONDS") or 5)
+# Отметки о записи для других воркеров
+RECENT_WRITE_KEY_PREFIX = "recent_write:"
+
+
+def parse_replica_hosts(value: str, default_port: int) -> list[dict]:
+    """'db-replica-1,db-replica-2:5433' -> [{"host": ..., "port": ...}, ...]"""
+    replicas = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(":")
+        replicas.append({"host": host, "port": int(port) if port else default_port})
+    return replicas
+
+
+class ReplicaSet:
+    """Реплики одного основного соединения; в ротации только прошедшие проверку."""
+
+    def __init__(self, primary: str, replicas: list[str]):
+        self.primary = primary
+        self.replicas = replicas
+        # До первой успешной проверки чтения идут на основной сервер
+        self.healthy: set[str] = set()
+        self.reads = dict.fromkeys(replicas, 0)
+        self._next = 0
+
+    def choose(self) -> str | None:
+        for _ in range(len(self.replicas)):
+            name = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if name in self.healthy:
+                self.reads[name] += 1
+                return name
+        return None
+
+    def set_health(self, name: str, healthy: bool, error: Exception | None = None):
+        if healthy and name not in self.healthy:
+            self.healthy.add(name)
+            logger.info(f"Replica {name} is healthy, reads from {self.primary} are routed to it")
+        elif not healthy and name in self.healthy:
+            self.healthy.discard(name)
+            logger.warning(f"Replica {name} is unhealthy, removed from rotation: {error}")
+
+    def stats(self) -> dict:
+        return {name: {"healthy": name in self.healthy, "reads": self.reads[name]} for name in self.replicas}
+
+
+# Основное соединение -> его реплики
+_replica_sets: dict[str, ReplicaSet] = {}
+# Принудительное чтение с основного сервера в текущей задаче
+_primary_reads: ContextVar[bool] = ContextVar("db_primary_reads", default=False)
+# Ключ недавно записанной сущности -> момент, до которого её читаем с основного сервера.
+# Окно одинаковое, поэтому порядок вставки совпадает с порядком истечения.
+# Отметки живут в памяти процесса; другие воркеры видят копию в Redis (written_recently_shared)
+_recent_writes: dict[str, float] = {}
+
+
+def configure_replicas(replicas: dict[str, list[str]]):
+    """Основное соединение -> имена соединений его реплик (вызывается из init_db)."""
+    _replica_sets.clear()
+    for primary, names in replicas.items():
+        if names:
+            _replica_sets[primary] = ReplicaSet(primary, names)
+
+
+@contextmanager
+def primary_reads():
+    """Все чтения внутри блока идут на основной сервер."""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def reads_from_replicas(model) -> bool:
+    """Могло ли чтение модели в текущем контексте уйти на реплику."""
+    return not _primary_reads.get() and model._meta.default_connection in _replica_sets
+
+
+async def remember_writes(keys: list[str]):
+    """Отмечает записанные сущности: в этом воркере и в Redis для остальных (только при репликах)."""
+    if not _replica_sets or not keys:
+        return
+    now = time.monotonic()
+    while _recent_writes:
+        oldest = next(iter(_recent_writes))
+        if _recent_writes[oldest] > now:
+            break
+        del _recent_writes[oldest]
+    for key in keys:
+        _recent_writes.pop(key, None)
+        _recent_writes[key] = now + READ_YOUR_WRITES_SECONDS
+
+    try:
+        pipeline = redis_pipeline()
+        for key in keys:
+            pipeline.set(RECENT_WRITE_KEY_PREFIX + key, 1, px=int(READ_YOUR_WRITES_SECONDS * 1000))
+        await pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Failed to share recent writes, other workers may read stale replicas: {e}")
+
+
+async def remember_write(key: str):
+    await remember_writes([key])
+
+
+def written_recently(key: str) -> bool:
+    deadline = _recent_writes.get(key)
+    return deadline is not None and deadline > time.monotonic()
+
+
+async def written_recently_shared(key: str) -> bool:
+    """Записал ли сущность любой воркер; без Redis считаем, что мог (перепроверка на основном сервере)."""
+    if written_recently(key):
+        return True
+    try:
+        return bool(await get_redis().exists(RECENT_WRITE_KEY_PREFIX + key))
+    except Exception as e:
+        logger.warning(f"Shared recent writes are unavailable: {e}")
+        return True
+
+
+class ReplicaRouter:
+    """Роутер Tortoise: None означает соединение модели по умолчанию (основной сервер)."""
+
+    def db_for_read(self, model) -> str | None:
+        if not _replica_sets or _primary_reads.get():
+            return None
+        primary = model._meta.default_connection
+        replica_set = _replica_sets.get(primary)
+        if replica_set is None:
+            return None
+        # Внутри транзакции чтения должны видеть её же изменения
+        if isinstance(connections.get(primary), TransactionalDBClient):
+            return None
+        return replica_set.choose()
+
+    def db_for_write(self, model) -> str | None:
+        return None
+
+
+async def _check_replica(replica_set: ReplicaSet, name: str):
+    try:
+        await asyncio.wait_for(connections.get(name).execute_query("SELECT 1"), REPLICA_CHECK_TIMEOUT_SECONDS)
+    except Exception as e:
+        replica_set.set_health(name, False, e)
+    else:
+        replica_set.set_health(name, True)
+
+
+async def check_replicas():
+    await asyncio.gather(*(
+        _check_replica(replica_set, name)
+        for replica_set in _replica_sets.values()
+        for name in replica_set.replicas
+    ))
+
+
+async def _health_check_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await check_replicas()
+
+
+async def start_replica_health_checks() -> asyncio.Task | None:
+    """Первая проверка выполняется сразу, дальше - в фоне каждые REPLICA_CHECK_INTERVAL_SECONDS."""
+    if not _replica_sets:
+        return None
+    await check_replicas()
+    return asyncio.create_task(_health_check_loop(REPLICA_CHECK_INTERVAL_SECONDS))
+
+
+async def stop_replica_health_checks(task: asyncio.Task | None):
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def get_replica_stats() -> dict:
+    return {primary: replica_set.stats() for primary, replica_set in _replica_sets.items()}
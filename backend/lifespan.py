@@ -1,18 +1,39 @@
 from tortoise import Tortoise
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from backend.utils.rate_limiter import get_redis
+from backend.utils.redis_client import get_redis, close_redis
+from backend.auth.hashing import get_password_hasher
+from backend.core.db_router import (POSTGRES_REPLICA_HOSTS, configure_replicas, parse_replica_hosts,
+                                    start_replica_health_checks, stop_replica_health_checks)
+from backend.utils.log_writer import stop_log_writers
+from backend.utils.metrics import start_snapshot_writer, stop_snapshot_writer
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
+# Настройки пула по умолчанию; запись DATABASES_CONFIG может переопределить их ключом "pool".
+# statement_cache_size=0 отключает кеш подготовленных выражений (нужно за pgbouncer в режиме transaction)
+_command_timeout = float(os.getenv("POSTGRES_COMMAND_TIMEOUT") or 30)
+POOL_DEFAULTS = {
+    "minsize": int(os.getenv("POSTGRES_POOL_MIN_SIZE") or 1),
+    "maxsize": int(os.getenv("POSTGRES_POOL_MAX_SIZE") or 10),
+    "max_inactive_connection_lifetime": float(os.getenv("POSTGRES_POOL_MAX_IDLE_SECONDS") or 300),
+    "statement_cache_size": int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE") or 512),
+    "command_timeout": _command_timeout if _command_timeout > 0 else None,
+}
+
 DATABASES_CONFIG = {
     "users": {
         "connection_name": "users_connection",
         "app_name": "users",
         "models_module": "backend.models.users",
-        "database": "users"
+        "database": "users",
+        # Например: "pool": {"maxsize": 20, "command_timeout": 10}
+        "pool": {},
+        # Реплики только для чтения, по умолчанию из POSTGRES_REPLICA_HOSTS.
+        # Например: "replicas": [{"host": "db-replica-1", "port": 5432}]
+        "replicas": None,
     }
 }
 
@@ -40,28 +61,51 @@ async def init_db():
 
     connections = {}
     apps = {}
+    replicas = {}
+    default_replicas = parse_replica_hosts(POSTGRES_REPLICA_HOSTS, port)
+    logger.info(f"PostgreSQL pool defaults: {POOL_DEFAULTS}")
 
     for name, config in DATABASES_CONFIG.items():
+        credentials = {
+            "host": host,
+            "port": port,
+            "user": user,
+            "password": password,
+            "database": config["database"],
+            **POOL_DEFAULTS,
+            **config.get("pool", {}),
+        }
         connections[config["connection_name"]] = {
-            "engine": "tortoise.backends.asyncpg",
-            "credentials": {
-                "host": host,
-                "port": port,
-                "user": user,
-                "password": password,
-                "database": config["database"],
-            },
+            # Клиент asyncpg с замером запросов (Server-Timing)
+            "engine": "backend.core.db_client",
+            "credentials": credentials,
         }
 
+        # Реплика отличается от основного сервера только адресом
+        replica_names = []
+        replica_configs = config.get("replicas")
+        for index, replica in enumerate(default_replicas if replica_configs is None else replica_configs):
+            replica_name = f"{config['connection_name']}_replica_{index}"
+            connections[replica_name] = {
+                "engine": "backend.core.db_client",
+                "credentials": {**credentials, **replica},
+            }
+            replica_names.append(replica_name)
+        replicas[config["connection_name"]] = replica_names
+        if replica_names:
+            logger.info(f"Read replicas for {config['connection_name']}: {replica_names}")
+
         apps[config["app_name"]] = {
             "models": [config["models_module"]],
             "default_connection": config["connection_name"]
         }
 
     try:
+        configure_replicas(replicas)
         await Tortoise.init({
             "connections": connections,
             "apps": apps,
+            "routers": ["backend.core.db_router.ReplicaRouter"],
         })
 
         logger.info("Generating database schema...")
@@ -85,14 +129,24 @@ async def close_db(app: FastAPI):
 async def lifespan(app: FastAPI):
     logger.info("Startup: initializing databases")
     await init_db()
+    replica_task = await start_replica_health_checks()
+    logger.info("Startup: calibrating bcrypt cost")
+    await get_password_hasher().calibrate()
     try:
         redis = get_redis()
         await redis.ping()
         logger.info(f"Startup: initializing Redis")
     except Exception as e:
         logger.error(f"Redis initialization has BROKE: {e}")
+    metrics_task = start_snapshot_writer()
     yield
+    await stop_snapshot_writer(metrics_task)
+    await stop_replica_health_checks(replica_task)
     logger.info("Shutdown: closing database connections")
     await close_db(app)
+    logger.info("Shutdown: stopping password hasher")
+    get_password_hasher().shutdown()
     logger.info("Shutdown: closing Redis connections")
-    await redis.aclose()
\ No newline at end of file
+    await close_redis()
+    logger.info("Shutdown: flushing request logs")
+    stop_log_writers()
\ No newline at end of file
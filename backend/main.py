@@ -5,6 +5,7 @@ import logging
 import uvicorn
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 
 # Загрузка dotenv
 dotenv_path = Path(__file__).parents[1] / ".env"
@@ -20,18 +21,41 @@ logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
 # Импорты модулей проекта
 from backend.lifespan import lifespan
-from backend.middleware.logger import log_requests
+from backend.middleware.compression import CompressionMiddleware
+from backend.middleware.logger import RequestLoggerMiddleware
 from backend.middleware.cors import make_cors_middleware
+from backend.middleware.metrics import MetricsMiddleware
+from backend.middleware.rate_limit import RateLimitMiddleware
+from backend.middleware.server_timing import ServerTimingMiddleware
+from backend.routes.documentation.info import openapi_router
+from backend.routes.metrics import metrics_router
 from backend.routes.route_manager import api_router
 from backend.middleware.validation_error_catcher import validation_exception_handler
+from backend.utils.timing import SERVER_TIMING_ENABLED
 
-app = FastAPI(lifespan=lifespan, middleware=make_cors_middleware(),docs_url=None, redoc_url=None)
+# openapi_url=None: схему отдаёт openapi_router из кеша с ETag и сжатием
+app = FastAPI(lifespan=lifespan, docs_url=None, redoc_url=None,
+              openapi_url=None, default_response_class=ORJSONResponse)
 
 # Подключение логгеров
 app.exception_handler(RequestValidationError)(validation_exception_handler)
-app.middleware("http")(log_requests)
+# Server-Timing - самый внутренний слой: этапы видит и заголовок, и логгер запросов
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+# Сжатие внутри логгера и метрик: в лог попадает размер ответа, ушедшего клиенту
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RequestLoggerMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Внешний слой после CORS: лишние запросы отсекаются до логгера и чтения тела
+app.add_middleware(RateLimitMiddleware)
+# CORS снаружи всех: ответы 429 тоже получают CORS-заголовки, и браузер видит Retry-After
+for middleware in make_cors_middleware():
+    app.add_middleware(middleware.cls, *middleware.args, **middleware.kwargs)
 
 app.include_router(api_router)
+# /metrics вне /api: не попадает под политики ограничения запросов, доступ - по METRICS_ALLOWED_NETWORKS
+app.include_router(metrics_router)
+app.include_router(openapi_router)
 
 if __name__ == "__main__":
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
@@ -0,0 +1,177 @@
+# backend.middleware.compression
+import os
+import time
+import zlib
+from backend.utils.metrics import Counter
+from backend.utils.static_cache import accepts, parse_accept_encoding
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Ответы меньше порога не сжимаются
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE") or 1024)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL") or 6)
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL") or 3)
+# Префиксы Content-Type, которые не сжимаются (уже сжатые форматы)
+COMPRESSION_EXCLUDED_TYPES = tuple(
+    item.strip().lower() for item in (
+        os.getenv("COMPRESSION_EXCLUDED_TYPES")
+        or "image/,video/,audio/,application/zip,application/gzip,application/octet-stream,application/pdf"
+    ).split(",") if item.strip()
+)
+
+COMPRESSED_RESPONSES = Counter("compression_responses_total", "Compressed responses", ("encoding",))
+COMPRESSION_BYTES_IN = Counter("compression_bytes_in_total", "Response bytes before compression", ("encoding",))
+COMPRESSION_BYTES_OUT = Counter("compression_bytes_out_total", "Response bytes after compression", ("encoding",))
+COMPRESSION_CPU_SECONDS = Counter(
+    "compression_cpu_seconds_total", "CPU time spent compressing responses", ("encoding",)
+)
+COMPRESSION_SKIPPED = Counter("compression_skipped_total", "Responses left uncompressed", ("reason",))
+
+
+class _GzipStream:
+    def __init__(self):
+        # wbits 16 + 15: формат gzip
+        self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Z_SYNC_FLUSH отдаёт клиенту всё сжатое к этому моменту, не дожидаясь конца потока
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+ENCODERS = {"gzip": _GzipStream}
+if zstandard is not None:
+    ENCODERS = {"zstd": _ZstdStream, **ENCODERS}
+
+
+def _header(headers, name: bytes) -> bytes | None:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware сжатия ответов (zstd при наличии модуля zstandard, иначе gzip) по Accept-Encoding.
+    Ответ из одного сообщения сжимается целиком, потоковый - по частям, без буферизации тела.
+    Пропускаются маленькие ответы, исключённые типы и ответы, у которых уже есть Content-Encoding.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 excluded_types: tuple = COMPRESSION_EXCLUDED_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_types = excluded_types
+
+    def _choose_encoding(self, scope) -> str | None:
+        accept_encoding = _header(scope["headers"], b"accept-encoding")
+        if not accept_encoding:
+            return None
+        codings = parse_accept_encoding(accept_encoding.decode("latin-1"))
+        for encoding in ENCODERS:
+            if accepts(codings, encoding):
+                return encoding
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        stream = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, stream, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                reason = None
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+                content_length = _header(headers, b"content-length")
+                if _header(headers, b"content-encoding") is not None:
+                    reason = "encoded"
+                elif message["status"] < 200 or message["status"] in (204, 304):
+                    reason = "no_body"
+                elif content_type.startswith(self.excluded_types):
+                    reason = "content_type"
+                elif content_length is not None and int(content_length) < self.minimum_size:
+                    reason = "small"
+                if reason is not None:
+                    COMPRESSION_SKIPPED.labels(reason).inc()
+                    passthrough = True
+                    await send(message)
+                    return
+                # Заголовки отправляются вместе с первым фрагментом тела, когда ясен его размер
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is None:
+                if not more_body and len(body) < self.minimum_size:
+                    COMPRESSION_SKIPPED.labels("small").inc()
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                stream = ENCODERS[encoding]()
+                headers = [
+                    (key, value) for key, value in start_message.get("headers", [])
+                    if key.lower() not in (b"content-length", b"etag")
+                ]
+                etag = _header(start_message.get("headers", []), b"etag")
+                if etag is not None:
+                    # Сжатое представление побайтно отличается: сильный ETag становится слабым
+                    headers.append((b"etag", etag if etag.startswith(b"W/") else b"W/" + etag))
+                headers.append((b"content-encoding", encoding.encode()))
+                vary = _header(headers, b"vary")
+                if vary is None:
+                    headers.append((b"vary", b"Accept-Encoding"))
+                elif b"accept-encoding" not in vary.lower():
+                    headers = [(k, v + b", Accept-Encoding" if k.lower() == b"vary" else v) for k, v in headers]
+
+                cpu_start = time.thread_time()
+                compressed = stream.compress(body, final=not more_body)
+                cpu_seconds = time.thread_time() - cpu_start
+                if not more_body:
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                COMPRESSED_RESPONSES.labels(encoding).inc()
+                await send({**start_message, "headers": headers})
+            else:
+                cpu_start = time.thread_time()
+                compressed = stream.compress(body, final=not more_body)
+                cpu_seconds = time.thread_time() - cpu_start
+
+            COMPRESSION_BYTES_IN.labels(encoding).inc(len(body))
+            COMPRESSION_BYTES_OUT.labels(encoding).inc(len(compressed))
+            COMPRESSION_CPU_SECONDS.labels(encoding).inc(cpu_seconds)
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
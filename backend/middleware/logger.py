@@ -1,117 +1,268 @@
+import json
 import logging
+import random
 import time
 import os
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from fastapi import Request
-from starlette.responses import FileResponse, StreamingResponse
-
-try:
-    from backend.routes.logging_config import EXCLUDED_200_URLS
-
-    middleware_logger = logging.getLogger("middleware")
-    if EXCLUDED_200_URLS:
-        middleware_logger.info(f" Excluded routes: {', '.join(EXCLUDED_200_URLS)}")
-    else:
-        middleware_logger.info(" No excluded routes")
-except ImportError:
-    EXCLUDED_200_URLS = []
-except Exception as e:
-    print(f"Error loading EXCLUDED_200_URLS: {e}")
-    EXCLUDED_200_URLS = []
+from backend.middleware.server_timing import SERVER_TIMING_STATE_KEY
+from backend.utils.client_ip import scope_client_ip
+from backend.utils.log_writer import BatchFileHandler, QueuedLogWriter
+from backend.utils.timing import spans_as_dict
+
+from backend.routes.logging_config import (
+    REQUEST_LOG_SAMPLE_RATES, REQUEST_LOG_SLOW_MS, REQUEST_LOG_SUCCESS_SAMPLE_RATE
+)
+
+middleware_logger = logging.getLogger("middleware")
+middleware_logger.info(
+    f" Success log sampling: default {REQUEST_LOG_SUCCESS_SAMPLE_RATE}, "
+    f"{len(REQUEST_LOG_SAMPLE_RATES)} route overrides, slow requests over {REQUEST_LOG_SLOW_MS}ms"
+)
 
 PROJECT_ROOT = Path(__file__).parents[2]
 LOG_DIR = Path(os.getenv("DB_DATA_DIR", PROJECT_ROOT / "logs"))
 LOG_DIR.mkdir(exist_ok=True)
 
+# Сколько байт тела запроса попадает в лог (0 - не захватывать)
+REQUEST_LOG_BODY_BYTES = int(os.getenv("REQUEST_LOG_BODY_BYTES") or 100)
+# Бинарные тела и загрузки файлов не захватываются
+SKIPPED_BODY_TYPES = (
+    "multipart/", "application/octet-stream", "application/zip", "application/gzip",
+    "application/pdf", "image/", "audio/", "video/",
+)
 
-class RequestLogger:
+# Фоновая запись логов: очередь ограничена, при переполнении запись отбрасывается.
+# Ждать места нельзя: постановка в очередь выполняется в event loop
+REQUEST_LOG_QUEUE_SIZE = int(os.getenv("REQUEST_LOG_QUEUE_SIZE") or 10000)
+REQUEST_LOG_BATCH_SIZE = int(os.getenv("REQUEST_LOG_BATCH_SIZE") or 256)
+REQUEST_LOG_FLUSH_INTERVAL_MS = int(os.getenv("REQUEST_LOG_FLUSH_INTERVAL_MS") or 500)
+
+# Формат файлов: text - прежние строки, json - один объект на строку
+REQUEST_LOG_FORMAT = (os.getenv("REQUEST_LOG_FORMAT") or "text").lower()
+# Ротация: по размеру и возрасту файла, архивы сжимаются gzip; 0 отключает ограничение
+REQUEST_LOG_MAX_BYTES = int(os.getenv("REQUEST_LOG_MAX_BYTES") or 100 * 1024 * 1024)
+REQUEST_LOG_MAX_AGE_HOURS = float(os.getenv("REQUEST_LOG_MAX_AGE_HOURS") or 24)
+REQUEST_LOG_BACKUP_COUNT = int(os.getenv("REQUEST_LOG_BACKUP_COUNT") or 14)
+REQUEST_LOG_COMPRESS = (os.getenv("REQUEST_LOG_COMPRESS") or "true").lower() in ("1", "true", "yes")
+
+
+class BodyPreview:
+    """Первые limit байт тела запроса и общий размер прочитанного приложением тела."""
+
+    __slots__ = ("data", "size", "limit")
+
+    def __init__(self, limit: int):
+        self.data = bytearray()
+        self.size = 0
+        self.limit = limit
+
+    def feed(self, chunk: bytes):
+        if len(self.data) < self.limit:
+            self.data += chunk[:self.limit - len(self.data)]
+        self.size += len(chunk)
+
+    def __str__(self) -> str:
+        text = self.data.decode("utf-8", errors="replace")
+        if self.size > len(self.data):
+            text += "...<truncated>"
+        return text
+
+
+class SuccessFilter(logging.Filter):
+    def filter(self, record):
+        return 200 <= getattr(record, 'status_code', 0) < 300
+
+
+class ErrorFilter(logging.Filter):
+    def filter(self, record):
+        return 400 <= getattr(record, 'status_code', 0) < 600
+
+
+LOG_MESSAGE = (
+    "%s %s - Status: %s, IP: %s, Time: %.2fms, Content-Type: %s, "
+    "Request-Body: %s, Streaming: %s"
+)
+
+
+# Форматтеры вызываются в потоке записи, в запросе сохраняется только словарь record.request
+class RequestTextFormatter(logging.Formatter):
     def __init__(self):
-        self.logger = self._setup_logger()
-        self.excluded_urls = EXCLUDED_200_URLS
+        super().__init__("%(asctime)s - %(levelname)s - %(message)s")
 
-    def _setup_logger(self):
-        logger = logging.getLogger("request_logger")
-        logger.setLevel(logging.INFO)
-        logger.propagate = False
+    def format(self, record):
+        fields = record.request
+        record.msg = LOG_MESSAGE
+        record.args = (
+            fields["method"], fields["path"], fields["status"], fields["ip"], fields["latency_ms"],
+            fields["content_type"], fields["request_body"], fields["streaming"],
+        )
+        return super().format(record)
 
-        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 
-        success_handler = logging.FileHandler(LOG_DIR / "success.log", encoding='utf-8')
-        error_handler = logging.FileHandler(LOG_DIR / "errors.log", encoding='utf-8')
+class RequestJsonFormatter(logging.Formatter):
+    def format(self, record):
+        fields = record.request
+        return json.dumps({
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "method": fields["method"],
+            "path": fields["path"],
+            "route": fields["route"],
+            "status": fields["status"],
+            "latency_ms": round(fields["latency_ms"], 2),
+            "slow": fields["slow"],
+            "ip": fields["ip"],
+            "content_type": fields["content_type"],
+            "request_bytes": fields["request_bytes"],
+            "response_bytes": fields["response_bytes"],
+            "request_body": str(fields["request_body"]),
+            "streaming": fields["streaming"],
+            **({"timing": spans_as_dict(fields["timing"])} if fields.get("timing") else {}),
+        }, ensure_ascii=False)
 
-        success_handler.setFormatter(formatter)
-        error_handler.setFormatter(formatter)
 
-        class SuccessFilter(logging.Filter):
-            def filter(self, record):
-                return 200 <= getattr(record, 'status_code', 0) < 300
+class RequestLogger:
+    def __init__(self, sample_rates: dict[str, float] | None = None,
+                 default_rate: float = REQUEST_LOG_SUCCESS_SAMPLE_RATE, slow_ms: float = REQUEST_LOG_SLOW_MS,
+                 writer: QueuedLogWriter | None = None):
+        self.sample_rates = REQUEST_LOG_SAMPLE_RATES if sample_rates is None else sample_rates
+        self.default_rate = default_rate
+        self.slow_ms = slow_ms
+        # Готовый writer (например, в тестах) не создаёт файлов и фонового потока
+        if writer is None:
+            writer = QueuedLogWriter(
+                "request_logger",
+                self._setup_handlers(),
+                max_size=REQUEST_LOG_QUEUE_SIZE,
+                batch_size=REQUEST_LOG_BATCH_SIZE,
+                flush_interval=REQUEST_LOG_FLUSH_INTERVAL_MS / 1000,
+            )
+            writer.start()
+        self.writer = writer
+
+    def _setup_handlers(self) -> list[logging.Handler]:
+        formatter = RequestJsonFormatter() if REQUEST_LOG_FORMAT == "json" else RequestTextFormatter()
+        rotation = {
+            "max_bytes": REQUEST_LOG_MAX_BYTES,
+            "max_age_seconds": REQUEST_LOG_MAX_AGE_HOURS * 3600,
+            "backup_count": REQUEST_LOG_BACKUP_COUNT,
+            "compress": REQUEST_LOG_COMPRESS,
+        }
+
+        success_handler = BatchFileHandler(LOG_DIR / "success.log", **rotation)
+        error_handler = BatchFileHandler(LOG_DIR / "errors.log", **rotation)
 
-        class ErrorFilter(logging.Filter):
-            def filter(self, record):
-                return 400 <= getattr(record, 'status_code', 0) < 600
+        success_handler.setFormatter(formatter)
+        error_handler.setFormatter(formatter)
 
         success_handler.addFilter(SuccessFilter())
         error_handler.addFilter(ErrorFilter())
+        return [success_handler, error_handler]
 
-        logger.addHandler(success_handler)
-        logger.addHandler(error_handler)
-        return logger
+    def should_log(self, route_path: str, status_code: int, latency_ms: float) -> bool:
+        """Решение о выборке принимается до создания записи: отброшенные запросы ничего не стоят."""
+        if 400 <= status_code < 600:
+            return True
+        if not 200 <= status_code < 300:
+            return False
+        if self.slow_ms and latency_ms >= self.slow_ms:
+            return True
+        rate = self.sample_rates.get(route_path, self.default_rate)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
 
-    async def log_request(self, request: Request, call_next):
-        start_time = time.time()
-        client_ip = self._get_client_ip(request)
-        request_body = await self._get_request_body(request)
+    def log(self, fields: dict):
+        record = logging.LogRecord("request_logger", logging.INFO, __file__, 0, "", None, None)
+        record.status_code = fields["status"]
+        record.request = fields
+        self.writer.enqueue(record)
 
-        response = await call_next(request)
 
-        process_time = (time.time() - start_time) * 1000
-        url_path = request.url.path
+# Заголовки запроса, которые нужны логгеру
+_LOGGED_HEADERS = frozenset((b"content-type", b"content-length"))
 
-        if self._should_log(url_path, response.status_code):
-            log_message = self._format_log_message(
-                request.method, url_path, response.status_code,
-                client_ip, process_time, request.headers.get("content-type", ""),
-                request_body, isinstance(response, (FileResponse, StreamingResponse))
-            )
-            self.logger.info(log_message, extra={'status_code': response.status_code})
 
-        return response
+class RequestLoggerMiddleware:
+    """
+    ASGI middleware логирования запросов. Статус берётся из http.response.start,
+    размер ответа и потоковость (more_body) - из http.response.body; первые
+    REQUEST_LOG_BODY_BYTES байт тела копируются по мере чтения приложением.
+    Лишних задач и копирования ответа нет, запись в файл выполняет фоновый поток.
+    """
 
-    def _get_client_ip(self, request: Request) -> str:
-        return (
-                request.headers.get("X-Forwarded-For", "").split(",")[0].strip()
-                or request.headers.get("X-Real-IP", "")
-                or request.headers.get("CF-Connecting-IP", "")
-                or request.client.host
-        )
+    def __init__(self, app, request_logger: RequestLogger | None = None, body_bytes: int = REQUEST_LOG_BODY_BYTES):
+        self.app = app
+        self.request_logger = request_logger or get_request_logger()
+        self.body_bytes = body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        headers = {name: value for name, value in scope["headers"] if name in _LOGGED_HEADERS}
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+
+        preview = None
+        request_body = ""
+        if self.body_bytes > 0:
+            if content_type.lower().startswith(SKIPPED_BODY_TYPES):
+                request_body = "<binary body not captured>"
+            else:
+                request_body = preview = BodyPreview(self.body_bytes)
+
+                app_receive = receive
+
+                async def receive():
+                    message = await app_receive()
+                    if message["type"] == "http.request":
+                        preview.feed(message.get("body", b""))
+                    return message
+
+        status_code = 500
+        response_bytes = 0
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+                streaming = streaming or message.get("more_body", False)
+            await send(message)
 
-    async def _get_request_body(self, request: Request) -> str:
         try:
-            body = await request.json()
-        except Exception:
-            try:
-                body = (await request.body()).decode("utf-8")
-            except:
-                body = "<unable to decode>"
-        return body
-
-    def _should_log(self, url_path: str, status_code: int) -> bool:
-        if 200 <= status_code < 300 and url_path in self.excluded_urls:
-            return False
-        return True
-
-    def _format_log_message(self, method: str, url: str, status: int, ip: str,
-                            time_ms: float, content_type: str, body: str, is_file: bool) -> str:
-        body_str = str(body)
-        if len(body_str) > 100:
-            body_str = body_str[:100] + "...<truncated>"
-
-        return (
-            f"{method} {url} - Status: {status}, IP: {ip}, "
-            f"Time: {time_ms:.2f}ms, Content-Type: {content_type}, "
-            f"Request-Body: {body_str}, File-Response: {is_file}"
-        )
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            # Шаблон пути маршрута (после маршрутизации FastAPI кладёт его в scope["route"])
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or scope["path"]
+            if self.request_logger.should_log(route_path, status_code, latency_ms):
+                content_length = headers.get(b"content-length", b"")
+                self.request_logger.log({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_path,
+                    "status": status_code,
+                    "latency_ms": latency_ms,
+                    "slow": bool(self.request_logger.slow_ms) and latency_ms >= self.request_logger.slow_ms,
+                    # Тот же адрес, что видят лимиты запросов и блокировка входа
+                    "ip": scope_client_ip(scope),
+                    "content_type": content_type,
+                    "request_bytes": preview.size if preview is not None
+                    else int(content_length) if content_length.isdigit() else None,
+                    "response_bytes": response_bytes,
+                    "request_body": request_body,
+                    "streaming": streaming,
+                    # Этапы Server-Timing, если middleware включён
+                    "timing": scope.get("state", {}).get(SERVER_TIMING_STATE_KEY),
+                })
 
 
-request_logger = RequestLogger()
-log_requests = request_logger.log_request
\ No newline at end of file
+@lru_cache
+def get_request_logger() -> RequestLogger:
+    return RequestLogger()
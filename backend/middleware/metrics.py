@@ -0,0 +1,47 @@
+# backend.middleware.metrics
+import time
+from backend.utils.metrics import Counter, Gauge, Histogram
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by method, route template and status", ("method", "route", "status")
+)
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route template", ("method", "route")
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being processed")
+
+# Запросы, не сопоставленные маршруту, собираются под одной меткой, чтобы сырые пути
+# (сканеры, опечатки) не раздували число рядов
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: счётчик запросов, гистограмма задержек и запросы в обработке по шаблону маршрута."""
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = HTTP_IN_FLIGHT.labels()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_DURATION.labels(method, route).observe(time.perf_counter() - start_time)
+            HTTP_REQUESTS.labels(method, route, status_code).inc()
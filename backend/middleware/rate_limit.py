@@ -0,0 +1,221 @@
+# backend.middleware.rate_limit
+import json
+import logging
+import re
+from dataclasses import dataclass
+from backend.routes.rate_limit_config import RATE_LIMIT_POLICIES
+from backend.utils.client_ip import scope_client_ip
+from backend.utils.metrics import Counter
+from backend.utils.rate_limiter import (
+    ALGORITHMS, DEFAULT_ALGORITHM, DIMENSIONS, HYBRID_ALGORITHM, CompositeRateLimitResult,
+    RateLimitResult, bearer_user, build_limit_specs, get_hybrid_rate_limiter, get_rate_limiter
+)
+
+logger = logging.getLogger(__name__)
+
+MATCH_CACHE_SIZE = 4096
+RATE_LIMITED = Counter("rate_limited_requests_total", "Requests rejected by the rate limit middleware", ("policy",))
+LIMITED_BODY = json.dumps({"detail": "Превышено количество запросов."}, ensure_ascii=False).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    max_requests: int
+    window_seconds: int
+    algorithm: str = DEFAULT_ALGORITHM
+    methods: frozenset | None = None
+    # Составной лимит: измерение -> (max_requests, window_seconds); проверяется одним вызовом Redis
+    limits: dict | None = None
+    # Путь исключён из ограничения
+    exempt: bool = False
+
+    def applies_to(self, method: str) -> bool:
+        return self.methods is None or method in self.methods
+
+
+class PolicyTable:
+    """
+    Скомпилированная таблица политик: точные пути — словарь, префиксы — от длинного
+    к короткому, regex — предкомпилированы. Приоритет: exact, prefix, regex.
+    Результаты сопоставления кешируются по (метод, путь).
+    """
+
+    def __init__(self, policies: list):
+        self._exact: dict[str, list[RateLimitPolicy]] = {}
+        self._prefixes: list[tuple[str, RateLimitPolicy]] = []
+        self._regexes: list[tuple[re.Pattern, RateLimitPolicy]] = []
+        self._cache: dict[tuple[str, str], RateLimitPolicy | None] = {}
+
+        for config in policies:
+            policy = self._compile_policy(config)
+            match, path = config.get("match", "exact"), config["path"]
+            if match == "exact":
+                self._exact.setdefault(path, []).append(policy)
+            elif match == "prefix":
+                self._prefixes.append((path, policy))
+            elif match == "regex":
+                self._regexes.append((re.compile(path), policy))
+            else:
+                raise ValueError(f"Unknown policy match type '{match}' in policy '{policy.name}'")
+        self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+
+    @staticmethod
+    def _compile_policy(config: dict) -> RateLimitPolicy:
+        name = config.get("name") or config["path"]
+        methods = config.get("methods")
+        methods = frozenset(m.upper() for m in methods) if methods else None
+        if config.get("exempt"):
+            return RateLimitPolicy(name=name, max_requests=0, window_seconds=0, methods=methods, exempt=True)
+
+        algorithm = config.get("algorithm", DEFAULT_ALGORITHM)
+        if algorithm != HYBRID_ALGORITHM and algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limiting algorithm '{algorithm}' in policy '{name}'")
+
+        limits = None
+        if config.get("limits"):
+            unknown = set(config["limits"]) - set(DIMENSIONS)
+            if unknown:
+                raise ValueError(f"Unknown rate limit dimensions {sorted(unknown)} in policy '{name}'")
+            limits = {dim: (int(value[0]), int(value[1])) for dim, value in config["limits"].items()}
+            # Для заголовка RateLimit-Policy по умолчанию берётся измерение ip (или первое заданное)
+            main = limits.get("ip") or next(iter(limits.values()))
+            config = {"max_requests": main[0], "window_seconds": main[1], **config}
+
+        return RateLimitPolicy(
+            name=name,
+            max_requests=int(config["max_requests"]),
+            window_seconds=int(config["window_seconds"]),
+            algorithm=algorithm,
+            methods=methods,
+            limits=limits,
+        )
+
+    def __len__(self) -> int:
+        return sum(map(len, self._exact.values())) + len(self._prefixes) + len(self._regexes)
+
+    def match(self, method: str, path: str) -> RateLimitPolicy | None:
+        key = (method, path)
+        if key in self._cache:
+            return self._cache[key]
+
+        policy = self._find(method, path)
+        # Пути приходят от клиента, поэтому кеш ограничен
+        if len(self._cache) >= MATCH_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = policy
+        return policy
+
+    def _find(self, method: str, path: str) -> RateLimitPolicy | None:
+        for policy in self._exact.get(path, ()):
+            if policy.applies_to(method):
+                return policy
+        for prefix, policy in self._prefixes:
+            if path.startswith(prefix) and policy.applies_to(method):
+                return policy
+        for pattern, policy in self._regexes:
+            if pattern.match(path) and policy.applies_to(method):
+                return policy
+        return None
+
+
+def _rate_limit_headers(policy: RateLimitPolicy, result: RateLimitResult) -> list[tuple[bytes, bytes]]:
+    reset_seconds = -(-result.retry_after_ms // 1000) if result.limited else policy.window_seconds
+    headers = [
+        (b"ratelimit-limit", str(policy.max_requests).encode()),
+        (b"ratelimit-remaining", str(max(0, result.remaining)).encode()),
+        (b"ratelimit-reset", str(reset_seconds).encode()),
+        (b"ratelimit-policy", f"{policy.max_requests};w={policy.window_seconds}".encode()),
+    ]
+    if result.limited:
+        headers.append((b"retry-after", str(reset_seconds).encode()))
+    return headers
+
+
+def _composite_headers(policy: RateLimitPolicy, result: CompositeRateLimitResult) -> list[tuple[bytes, bytes]]:
+    """RateLimit-* по самому ограничивающему измерению, RateLimit-Policy перечисляет все."""
+    if not result.remaining:
+        # Ни одно измерение не применимо (например, только user для анонимного запроса)
+        return []
+    dimension = result.most_constrained()
+    max_requests, window_seconds = policy.limits.get(dimension, (policy.max_requests, policy.window_seconds))
+    headers = _rate_limit_headers(
+        RateLimitPolicy(policy.name, max_requests, window_seconds),
+        RateLimitResult(result.limited, result.remaining.get(dimension, max_requests), result.retry_after_ms),
+    )
+    headers[3] = (b"ratelimit-policy", ", ".join(
+        f"{limit};w={window};comment=\"{dim}\"" for dim, (limit, window) in policy.limits.items()
+        if dim in result.remaining
+    ).encode())
+    headers.append((b"ratelimit-scope", dimension.encode()))
+    return headers
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware ограничения запросов. Проверка выполняется до маршрутизации,
+    чтения тела и валидации, поэтому отклонённый запрос почти ничего не стоит.
+    """
+
+    def __init__(self, app, policies: list | None = None):
+        self.app = app
+        self.table = PolicyTable(RATE_LIMIT_POLICIES if policies is None else policies)
+        self.disabled = len(self.table) == 0
+        logger.info(f"Rate limit middleware: {len(self.table)} policies loaded")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.disabled:
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.table.match(scope["method"], scope["path"])
+        if policy is None or policy.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        ip_address = scope_client_ip(scope)
+        if policy.limits is not None:
+            user = bearer_user(_header(scope, b"authorization")) if "user" in policy.limits else None
+            result = await get_rate_limiter().check_many(
+                build_limit_specs(policy.name, ip_address, user, policy.limits)
+            )
+            headers = _composite_headers(policy, result)
+        elif policy.algorithm == HYBRID_ALGORITHM:
+            result = await get_hybrid_rate_limiter().check(
+                ip_address, policy.name, policy.max_requests, policy.window_seconds
+            )
+            headers = _rate_limit_headers(policy, result)
+        else:
+            result = await get_rate_limiter().check(
+                ip_address, policy.name, policy.max_requests, policy.window_seconds, policy.algorithm
+            )
+            headers = _rate_limit_headers(policy, result)
+
+        if result.limited:
+            logger.info(f"POLICY: {policy.name} went beyond the limit from {ip_address}")
+            RATE_LIMITED.labels(policy.name).inc()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(LIMITED_BODY)).encode()),
+                    *headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": LIMITED_BODY})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
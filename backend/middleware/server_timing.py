@@ -0,0 +1,37 @@
+# backend.middleware.server_timing
+import time
+from backend.utils.timing import end_request_timing, server_timing_header, start_request_timing
+
+# Ключ в scope["state"], по которому логгер запросов берёт этапы
+SERVER_TIMING_STATE_KEY = "server_timing"
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware: собирает этапы запроса в ContextVar и добавляет заголовок Server-Timing
+    к http.response.start. Этапы остаются в scope["state"] для структурированного лога.
+    Подключается только при SERVER_TIMING_ENABLED.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        spans, token = start_request_timing()
+        scope.setdefault("state", {})[SERVER_TIMING_STATE_KEY] = spans
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing_header(spans, (time.perf_counter() - start_time) * 1000)
+                message["headers"] = [*message.get("headers", ()), (b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request_timing(token)
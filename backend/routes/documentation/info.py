@@ -1,28 +1,52 @@
 # backend/routes/documentation.py
 
 import logging
+from functools import lru_cache
 from pathlib import Path
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import HTMLResponse
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from backend.utils.static_cache import CachedAsset
 
 logger = logging.getLogger(__name__)
 info_router = APIRouter()
+# Подключается к приложению без префикса /api: scalar.html загружает схему с /openapi.json
+openapi_router = APIRouter()
 
-@info_router.get("/documentation")
-async def serve_scalar_documentation():
-    # Вычисляем путь
-    static_path = Path(__file__).parents[0] / "scalar.html"
-    logger.debug(f"[DEBUG] Путь к scalar.html: {static_path}")
+STATIC_DIR = Path(__file__).parents[0]
+
+
+@lru_cache
+def _load_static(name: str, media_type: str) -> CachedAsset:
+    """Файл читается и сжимается один раз на процесс."""
+    static_path = STATIC_DIR / name
+    logger.debug(f"[DEBUG] Путь к {name}: {static_path}")
+    asset = CachedAsset(static_path.read_bytes(), media_type)
+    logger.info(f"Static asset {name} cached: {asset.stats()}")
+    return asset
 
+
+@info_router.get("/documentation")
+async def serve_scalar_documentation(request: Request):
     try:
-        with open(static_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        logger.debug(f"[DEBUG] Файл успешно прочитан. Длина контента: {len(content)}")
+        asset = _load_static("scalar.html", "text/html; charset=utf-8")
     except FileNotFoundError:
-        logger.error(f"[ERROR] Файл '{static_path}' не найден.")
-        raise HTTPException(status_code=500, detail=f"Файл документации '{static_path}' не найден.")
+        logger.error(f"[ERROR] Файл 'scalar.html' не найден в {STATIC_DIR}.")
+        raise HTTPException(status_code=500, detail="Файл документации 'scalar.html' не найден.")
     except Exception as e:
         logger.error(f"[ERROR] Неизвестная ошибка при чтении файла: {e}")
         raise HTTPException(status_code=500, detail=f"Ошибка чтения файла: {e}")
 
-    return HTMLResponse(content=content)
\ No newline at end of file
+    return asset.response(request)
+
+
+# Схема OpenAPI не меняется после старта: генерируется и сжимается при первом запросе
+_openapi_asset: CachedAsset | None = None
+
+
+@openapi_router.get("/openapi.json", include_in_schema=False)
+async def serve_openapi(request: Request):
+    global _openapi_asset
+    if _openapi_asset is None:
+        _openapi_asset = CachedAsset(orjson.dumps(request.app.openapi()), "application/json")
+        logger.info(f"OpenAPI schema cached: {_openapi_asset.stats()}")
+    return _openapi_asset.response(request)
@@ -1,13 +1,53 @@
 # backend.routes.health
-from fastapi import APIRouter
+import logging
+from fastapi import APIRouter, Depends
 from tortoise import Tortoise
+from backend.auth.hashing import get_password_hasher
+from backend.auth.user_auth import get_current_admin
+from backend.auth.user_check import get_user_cache_stats
+from backend.core.db_client import get_db_pool_stats
+from backend.core.db_router import get_replica_stats
+from backend.utils.log_writer import get_log_writer_stats
+from backend.utils.rate_limiter import get_redis_breaker
+from backend.utils.redis_client import get_redis_pool_stats, redis_pipeline
 
 health_router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _runtime_stats() -> dict:
+    return {
+        "hasher": get_password_hasher().stats(),
+        "user_cache": get_user_cache_stats(),
+        "redis_circuit": get_redis_breaker().stats(),
+        "db_pools": get_db_pool_stats(),
+        "db_replicas": get_replica_stats(),
+        "redis_pool": get_redis_pool_stats(),
+        "log_writers": get_log_writer_stats(),
+    }
+
+
+async def _redis_status() -> str:
+    try:
+        await redis_pipeline().ping().execute()
+        return "ok"
+    except Exception as e:
+        logger.warning(f"Health check: Redis is unavailable: {e}")
+        return "error"
+
 
 @health_router.get("/health")
 async def health_check():
+    """Проверка живости без внутренних подробностей: открыта всем и не ограничивается лимитером."""
     try:
         await Tortoise.get_connection("users_connection").execute_query("SELECT 1")
-        return {"status": "healthy", "db": "ok"}
+        return {"status": "healthy", "db": "ok", "redis": await _redis_status()}
     except Exception as e:
-        return {"status": "unhealthy", "db": str(e)}
\ No newline at end of file
+        logger.warning(f"Health check: database is unavailable: {e}")
+        return {"status": "unhealthy", "db": "error", "redis": await _redis_status()}
+
+
+@health_router.get("/health/details", dependencies=[Depends(get_current_admin)])
+async def health_details():
+    """Состояние пулов, кешей, очередей и размыкателя - только для администраторов."""
+    return _runtime_stats()
@@ -1,29 +1,39 @@
 # backend.routes.logging_config
-from fastapi.routing import APIRoute
+import json
+import logging
+import os
+from pathlib import Path
 
+logger = logging.getLogger(__name__)
 
-def get_all_route_paths() -> list:
-    """Получает все пути из API роутера"""
-    try:
-        # Отложенный импорт, чтобы избежать циклических зависимостей
-        from backend.routes.route_manager import api_router
+# Доля успешных (2xx) ответов, попадающих в success.log: 0 - не логировать, 1 - логировать все.
+# Ошибки (4xx/5xx) логируются всегда
+REQUEST_LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_SUCCESS_SAMPLE_RATE") or 0)
+# Запросы медленнее порога логируются независимо от выборки (0 - отключено)
+REQUEST_LOG_SLOW_MS = float(os.getenv("REQUEST_LOG_SLOW_MS") or 1000)
 
-        paths = set()
-        if api_router:
-            for route in api_router.routes:
-                if isinstance(route, APIRoute):
-                    full_path = route.path  # Используем просто route.path
-                    paths.add(full_path)
 
-        path_list = list(paths)
-        return path_list
+def load_sample_rates() -> dict[str, float]:
+    """
+    Загружает доли выборки по маршрутам из REQUEST_LOG_SAMPLE_RATES: JSON-объект или путь
+    к JSON-файлу вида {"/api/login": 0.1, "/api/users/{user_id}": 1}. Ключ - шаблон пути
+    маршрута, поэтому запросы с разными параметрами попадают в одну выборку.
+    """
+    raw = os.getenv("REQUEST_LOG_SAMPLE_RATES")
+    if not raw:
+        return {}
 
+    try:
+        if not raw.lstrip().startswith("{"):
+            raw = Path(raw).read_text(encoding="utf-8")
+        rates = json.loads(raw)
+        if not isinstance(rates, dict):
+            raise ValueError("REQUEST_LOG_SAMPLE_RATES must be a JSON object")
+        return {path: min(1.0, max(0.0, float(rate))) for path, rate in rates.items()}
     except Exception as e:
-        print(f"ERROR in get_all_route_paths: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        logger.error(f"Invalid REQUEST_LOG_SAMPLE_RATES, using default rate only: {e}")
+        return {}
 
 
-# Глобальная переменная с путями
-EXCLUDED_200_URLS = get_all_route_paths()
\ No newline at end of file
+# Глобальная переменная с долями выборки по маршрутам
+REQUEST_LOG_SAMPLE_RATES = load_sample_rates()
@@ -0,0 +1,63 @@
+# backend.routes.metrics
+import logging
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from backend.core.db_client import get_db_pool_stats
+from backend.utils.client_ip import ip_in_networks, parse_networks, scope_client_ip
+from backend.utils.metrics import CONTENT_TYPE, Gauge, REGISTRY
+from backend.utils.redis_client import get_redis_pool, get_redis_pool_stats
+
+metrics_router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Откуда разрешено читать /metrics (адрес клиента с учётом TRUSTED_PROXIES); по умолчанию только localhost
+METRICS_ALLOWED_NETWORKS = parse_networks(
+    os.getenv("METRICS_ALLOWED_NETWORKS") or "127.0.0.0/8,::1", "METRICS_ALLOWED_NETWORKS"
+)
+
+DB_POOL_SIZE = Gauge("db_pool_connections", "Open database pool connections", ("connection",))
+DB_POOL_IDLE = Gauge("db_pool_idle_connections", "Idle database pool connections", ("connection",))
+DB_POOL_IN_USE = Gauge("db_pool_in_use_connections", "Database connections checked out of the pool", ("connection",))
+DB_POOL_MAX = Gauge("db_pool_max_connections", "Database pool size limit", ("connection",))
+DB_POOL_WAITERS = Gauge("db_pool_waiters", "Tasks waiting for a database pool connection", ("connection",))
+REDIS_POOL_IN_USE = Gauge("redis_pool_in_use_connections", "Redis connections checked out of the pool")
+REDIS_POOL_IDLE = Gauge("redis_pool_idle_connections", "Idle Redis pool connections")
+REDIS_POOL_MAX = Gauge("redis_pool_max_connections", "Redis pool size limit")
+
+
+def _update_db_pool_gauges():
+    # Время получения соединения - гистограмма db_pool_acquire_seconds в backend.core.db_client
+    for name, stats in get_db_pool_stats().items():
+        DB_POOL_SIZE.labels(name).set(stats["size"])
+        DB_POOL_IDLE.labels(name).set(stats["idle"])
+        DB_POOL_IN_USE.labels(name).set(stats["in_use"])
+        DB_POOL_MAX.labels(name).set(stats["max_size"])
+        DB_POOL_WAITERS.labels(name).set(stats["waiters"])
+
+
+def _update_redis_pool_gauges():
+    # Пул не создаём ради метрик: до первого обращения к Redis датчиков нет
+    if not get_redis_pool.cache_info().currsize:
+        return
+    stats = get_redis_pool_stats()
+    REDIS_POOL_IN_USE.set(stats["in_use"])
+    REDIS_POOL_IDLE.set(stats["idle"])
+    REDIS_POOL_MAX.set(stats["max_connections"])
+
+
+REGISTRY.add_callback(_update_db_pool_gauges)
+REGISTRY.add_callback(_update_redis_pool_gauges)
+
+
+async def metrics_access(request: Request):
+    ip_address = scope_client_ip(request.scope)
+    if not ip_in_networks(ip_address, METRICS_ALLOWED_NETWORKS):
+        logger.warning(f"Metrics request from {ip_address} rejected")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Доступ запрещён")
+
+
+@metrics_router.get("/metrics", include_in_schema=False, dependencies=[Depends(metrics_access)])
+async def metrics():
+    """Метрики в текстовом формате Prometheus (сумма по всем воркерам при METRICS_MULTIPROC_DIR)."""
+    return PlainTextResponse(await REGISTRY.render_async(), media_type=CONTENT_TYPE)
@@ -0,0 +1,44 @@
+# backend.routes.rate_limit_config
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Таблица политик для RATE_LIMIT_POLICIES. Поля: name, match (exact | prefix | regex), path,
+# methods (необязательно), max_requests, window_seconds, algorithm (необязательно).
+# Вместо max_requests/window_seconds можно задать составной лимит:
+# "limits": {"ip": [100, 60], "user": [300, 60], "route": [5000, 60], "global": [20000, 60]}
+# "exempt": true исключает путь из ограничения (и из обращения к Redis).
+# По умолчанию таблица пуста: каждая политика - лишний вызов Redis на запрос, а за обратным
+# прокси лимит по ip без TRUSTED_PROXIES делился бы всеми клиентами. Пример:
+# [{"name": "health", "match": "exact", "path": "/api/health", "exempt": true},
+#  {"name": "api", "match": "prefix", "path": "/api/", "max_requests": 1200, "window_seconds": 60,
+#   "algorithm": "sliding_window"}]
+DEFAULT_RATE_LIMIT_POLICIES = []
+
+
+def load_rate_limit_policies() -> list:
+    """
+    Загружает таблицу политик из RATE_LIMIT_POLICIES: JSON-массив или путь к JSON-файлу.
+    Без переменной (или с пустым массивом) middleware ничего не ограничивает.
+    """
+    raw = os.getenv("RATE_LIMIT_POLICIES")
+    if not raw:
+        return DEFAULT_RATE_LIMIT_POLICIES
+
+    try:
+        if not raw.lstrip().startswith("["):
+            raw = Path(raw).read_text(encoding="utf-8")
+        policies = json.loads(raw)
+        if not isinstance(policies, list):
+            raise ValueError("RATE_LIMIT_POLICIES must be a JSON array")
+        return policies
+    except Exception as e:
+        logger.error(f"Invalid RATE_LIMIT_POLICIES, using defaults: {e}")
+        return DEFAULT_RATE_LIMIT_POLICIES
+
+
+# Глобальная переменная с политиками
+RATE_LIMIT_POLICIES = load_rate_limit_policies()
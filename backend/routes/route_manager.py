@@ -4,7 +4,7 @@ from fastapi.routing import APIRoute
 
 route_groups = {
     "documentation": {"info"},
-    "user_modules": {"login", "create_user"},
+    "user_modules": {"login", "create_user", "import_users"},
     "test":{"rate_test"},
 }
 
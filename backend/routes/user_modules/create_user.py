@@ -1,10 +1,11 @@
 # backend.routes.user_modules.create_user
 from fastapi import APIRouter, HTTPException, status
-from pydantic import field_validator
+from pydantic import BaseModel, field_validator
 from tortoise.contrib.pydantic import pydantic_model_creator
 from backend.models.users_roles import UserRole
 from backend.auth.add_users import handle_create_user_request
 from backend.models.users import User
+from backend.utils.responses import model_response
 from pydantic_core import PydanticCustomError
 import logging
 
@@ -27,8 +28,18 @@ class CreateUserRequest(BaseCreateUserRequest):
         except ValueError:
             raise PydanticCustomError("value_error", "Недопустимая роль")
 
+
+class CreatedUser(BaseModel):
+    login: str
+    role: UserRole
+
+
+class CreateUserResponse(BaseModel):
+    status: str
+    user: CreatedUser
+
 @create_user_router.post("/create_user",
-    response_model=dict,
+    response_model=CreateUserResponse,
     responses={
         200: {"description": "Успешное создание пользователя"},
         404: {"description": "Пользователь не создан"},
@@ -62,7 +73,10 @@ async def create_user(user_data: CreateUserRequest):
     try:
         result = await handle_create_user_request(user_data.model_dump())
         logger.info(f"User created successfully: {user_data.login}")
-        return result
+        return model_response(CreateUserResponse.model_construct(
+            status=result["status"],
+            user=CreatedUser.model_construct(**result["user"]),
+        ))
     except HTTPException as e:
         logger.warning(f"User creation failed for {user_data.login}: {e.detail}")
         raise
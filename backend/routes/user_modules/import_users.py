@@ -0,0 +1,95 @@
+# backend.routes.user_modules.import_users
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from backend.auth.bulk_import import import_users as run_import, BULK_IMPORT_MAX_CONCURRENT, SUPPORTED_FORMATS
+from backend.auth.user_auth import get_current_admin
+
+import_users_router = APIRouter()
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+# Импорты, выполняющиеся в этом воркере
+_active_imports = 0
+
+
+@import_users_router.post("/import_users",
+    response_model=dict,
+    dependencies=[Depends(get_current_admin)],
+    responses={
+        200: {"description": "Импорт выполнен, отчёт по строкам в ответе"},
+        401: {"description": "Нет токена или он недействителен"},
+        403: {"description": "Импорт доступен только администраторам"},
+        415: {"description": "Неподдерживаемый формат"},
+        500: {"description": "Ошибка сервера"},
+        503: {"description": "Импорт уже выполняется или пул хеширования перегружен"}
+    },
+    description="""
+## Массовый импорт пользователей
+
+Эндпоинт `/import_users` принимает поток пользователей в формате NDJSON или CSV
+и создаёт их пачками. Пароли хешируются параллельно, дубликаты и ошибки
+валидации не прерывают импорт, а возвращаются в отчёте с номером строки.
+
+Доступен только администраторам (Bearer-токен). Одновременно выполняется не больше
+`BULK_IMPORT_MAX_CONCURRENT` импортов; при перегрузке пула хеширования импорт
+прерывается с 503, повторный запуск того же файла отметит созданных пользователей как дубликаты.
+
+### Тип запроса
+POST
+
+### Формат
+Определяется по `Content-Type` (`application/x-ndjson` или `text/csv`)
+либо параметром `?format=ndjson|csv`.
+
+### Пример NDJSON
+```
+{"login": "user1", "password": "StrongPass123", "role": "user"}
+{"login": "user2", "password": "StrongPass123"}
+```
+
+### Пример CSV
+```
+login,password,role
+user1,StrongPass123,user
+```
+"""
+)
+async def import_users(request: Request, format: str | None = None):
+    global _active_imports
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or CONTENT_TYPE_FORMATS.get(content_type)
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Поддерживаемые форматы: {', '.join(SUPPORTED_FORMATS)}"
+        )
+
+    if _active_imports >= BULK_IMPORT_MAX_CONCURRENT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Импорт уже выполняется, повторите попытку позже",
+            headers={"Retry-After": "10"}
+        )
+
+    _active_imports += 1
+    try:
+        report = await run_import(request.stream(), fmt)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Server error during bulk import: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Ошибка сервера при импорте пользователей"
+        )
+    finally:
+        _active_imports -= 1
+
+    logger.info(f"Bulk import: {report.created} of {report.total} users created")
+    return {"status": "completed", **report.as_dict()}
@@ -1,12 +1,15 @@
 # backend.routes.user_modules.login
 import logging
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from fastapi.security import HTTPBearer
 from pydantic import BaseModel
-from tortoise.contrib.pydantic import pydantic_model_creator
 from datetime import timedelta
 from backend.auth.user_auth import create_access_token, authenticate_user
-from backend.models.users import User
+from backend.models.users_roles import UserRole
+from backend.utils.client_ip import scope_client_ip
+from backend.utils.login_throttle import get_login_throttle
+from backend.utils.responses import model_response
+from backend.utils.timing import span
 import os
 
 login_router = APIRouter()
@@ -19,11 +22,9 @@ class LoginRequest(BaseModel):
     password: str
 
 
-UserOut = pydantic_model_creator(
-    User,
-    name="UserOut",
-    include=("login", "role")
-)
+class UserOut(BaseModel):
+    login: str
+    role: UserRole
 
 
 class LoginResponse(BaseModel):
@@ -41,6 +42,7 @@ class LoginResponse(BaseModel):
         401: {"description": "Неверные учетные данные"},
         404: {"description": "Пользователь не найден"},
         422: {"description": "Ошибки валидации"},
+        429: {"description": "Слишком много неудачных попыток входа"},
         500: {"description": "Ошибка сервера"}
     },
     description="""
@@ -64,17 +66,37 @@ POST
 }
 """
 )
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, http_request: Request):
+    # За обратным прокси - адрес клиента из X-Forwarded-For (TRUSTED_PROXIES), как у лимитов запросов
+    ip_address = scope_client_ip(http_request.scope)
+    throttle = get_login_throttle()
+    # Проверка блокировки до любых обращений к БД и bcrypt
+    retry_after_ms = await throttle.retry_after_ms(request.login, ip_address)
+    if retry_after_ms > 0:
+        logger.warning(f"Login throttled for user {request.login} from {ip_address}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много неудачных попыток входа, повторите позже",
+            headers={"Retry-After": str(-(-retry_after_ms // 1000))}
+        )
+
     try:
-        user = await authenticate_user(request.login, request.password)
+        try:
+            user = await authenticate_user(request.login, request.password)
+        except HTTPException as e:
+            if e.status_code == status.HTTP_401_UNAUTHORIZED:
+                await throttle.record_failure(request.login, ip_address)
+            raise
+        await throttle.record_success(request.login, ip_address)
         logger.info(f"User {request.login} authenticated successfully")
 
         try:
             expires_minutes = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 60))
-            access_token = create_access_token(
-                data={"sub": user.login, "role": user.role},
-                expires_delta=timedelta(minutes=expires_minutes)
-            )
+            with span("jwt"):
+                access_token = create_access_token(
+                    data={"sub": user.login, "role": user.role},
+                    expires_delta=timedelta(minutes=expires_minutes)
+                )
         except ValueError:
             logger.error("Invalid JWT expiration configuration")
             raise HTTPException(
@@ -82,10 +104,14 @@ async def login(request: LoginRequest):
                 detail="Ошибка конфигурации сервера"
             )
 
-        response = LoginResponse(
-            user=await UserOut.from_tortoise_orm(user),
-            access_token=access_token
-        )
+        with span("serialize"):
+            # Строка уже загружена и проверена: собираем модель без валидации и сериализуем один раз
+            response = model_response(LoginResponse.model_construct(
+                user=UserOut.model_construct(login=user.login, role=user.role),
+                access_token=access_token,
+                token_type="bearer",
+                message="Успешная авторизация",
+            ))
         return response
 
     except HTTPException as e:
@@ -0,0 +1,79 @@
+# backend.utils.circuit_breaker
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Размыкатель для внешней зависимости (Redis и т.п.).
+    После failure_threshold ошибок подряд цепь размыкается и вызовы не выполняются;
+    через паузу пропускается один пробный вызов. Каждая неудачная проба
+    удваивает паузу до max_delay_seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3,
+                 base_delay_seconds: float = 1.0, max_delay_seconds: float = 30.0):
+        self.name = name
+        self._failure_threshold = max(1, failure_threshold)
+        self._base_delay = base_delay_seconds
+        self._max_delay = max_delay_seconds
+
+        self.state = self.CLOSED
+        self._failures = 0
+        self._delay = base_delay_seconds
+        self._retry_at = 0.0
+        self._probe_in_flight = False
+        self.opened_count = 0
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now >= self._retry_at:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        # Проба, результат которой так и не сообщили, считается потерянной через одну паузу
+        probe_lost = now >= self._retry_at + self._delay
+        if self.state == self.HALF_OPEN and (not self._probe_in_flight or probe_lost):
+            self._retry_at = now
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def retry_after_seconds(self) -> float:
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = self.CLOSED
+        self._failures = 0
+        self._delay = self._base_delay
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self.state == self.CLOSED:
+                self.opened_count += 1
+            elif self.state == self.HALF_OPEN:
+                # Пробный вызов не удался: увеличиваем паузу перед следующей попыткой
+                self._delay = min(self._delay * 2, self._max_delay)
+            self.state = self.OPEN
+            self._retry_at = time.monotonic() + self._delay
+            self._probe_in_flight = False
+            logger.warning(f"Circuit '{self.name}' opened for {self._delay:.1f}s after {self._failures} failures")
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "retry_after_seconds": round(self.retry_after_seconds(), 2),
+            "opened_count": self.opened_count,
+        }
@@ -0,0 +1,62 @@
+# backend.utils.client_ip
+"""
+Адрес клиента для лимитов запросов, блокировок входа и логов.
+X-Forwarded-For учитывается, только если запрос пришёл от доверенного прокси
+(TRUSTED_PROXIES): иначе клиент мог бы подставить любой адрес и обойти лимиты.
+"""
+import ipaddress
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def parse_networks(value: str, setting: str = "TRUSTED_PROXIES") -> tuple:
+    """'10.0.0.1, 172.16.0.0/12' -> сети ipaddress; некорректные записи пропускаются."""
+    networks = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.error(f"Invalid {setting} entry ignored: {item}")
+    return tuple(networks)
+
+
+# Адреса или подсети обратных прокси, которым разрешено передавать адрес клиента; пусто - никому
+TRUSTED_PROXIES = parse_networks(os.getenv("TRUSTED_PROXIES") or "")
+
+
+def ip_in_networks(ip: str, networks: tuple) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def resolve_client_ip(peer: str | None, forwarded_for: str | None, trusted: tuple = TRUSTED_PROXIES) -> str:
+    """
+    peer - адрес TCP-соединения. Если он доверенный, X-Forwarded-For разбирается справа
+    налево: первый адрес, не принадлежащий доверенным прокси, и есть клиент.
+    """
+    if not peer:
+        return "unknown"
+    if not forwarded_for or not trusted or not ip_in_networks(peer, trusted):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not ip_in_networks(hop, trusted):
+            return hop
+    return hops[0] if hops else peer
+
+
+def scope_client_ip(scope) -> str:
+    """Адрес клиента ASGI-запроса; несколько заголовков X-Forwarded-For склеиваются по порядку."""
+    client = scope.get("client")
+    forwarded_for = ",".join(
+        value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for"
+    )
+    return resolve_client_ip(client[0] if client else None, forwarded_for)
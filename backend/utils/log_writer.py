@@ -0,0 +1,264 @@
+# backend.utils.log_writer
+import gzip
+import logging
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+# Запущенные писатели по имени: lifespan останавливает их, health показывает статистику
+_writers: dict[str, "QueuedLogWriter"] = {}
+# Сжатие ротированных файлов выполняется отдельно, чтобы не задерживать запись
+_compressor: ThreadPoolExecutor | None = None
+_compressor_lock = threading.Lock()
+
+
+def _get_compressor() -> ThreadPoolExecutor:
+    global _compressor
+    with _compressor_lock:
+        if _compressor is None:
+            _compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+        return _compressor
+
+
+def _compress_and_prune(path: Path, base: Path, backup_count: int):
+    try:
+        with open(path, "rb") as source, gzip.open(path.with_name(path.name + ".gz"), "wb") as target:
+            shutil.copyfileobj(source, target)
+        path.unlink()
+    except Exception as e:
+        logger.error(f"Log compression failed for {path}: {e}")
+    _prune(base, backup_count)
+
+
+def _prune(base: Path, backup_count: int):
+    if backup_count <= 0:
+        return
+    # Архивы сжимаются по одному в порядке ротации, поэтому mtime хронологичен
+    rotated = sorted(base.parent.glob(f"{base.name}.*"), key=lambda path: path.stat().st_mtime)
+    for old in rotated[:-backup_count]:
+        try:
+            old.unlink()
+        except OSError as e:
+            logger.error(f"Cannot remove old log {old}: {e}")
+
+
+class BatchFileHandler(logging.Handler):
+    """
+    Файловый обработчик, который пишет пачку записей одним write и одним flush.
+    Ротация по размеру (max_bytes) и возрасту файла (max_age_seconds); ротированный
+    файл получает суффикс со временем и сжимается gzip в фоне. Хранится не больше
+    backup_count архивов. Нулевые значения отключают соответствующее ограничение.
+    """
+
+    def __init__(self, filename: Path, encoding: str = "utf-8", max_bytes: int = 0,
+                 max_age_seconds: float = 0, backup_count: int = 0, compress: bool = True):
+        super().__init__()
+        self.filename = Path(filename)
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.backup_count = backup_count
+        self.compress = compress
+        self._open()
+
+    def _open(self):
+        self.stream = open(self.filename, "a", encoding=self.encoding)
+        self.size = self.stream.tell()
+        self.opened_at = time.time()
+
+    def _should_rotate(self) -> bool:
+        if self.size == 0:
+            return False
+        if self.max_bytes and self.size >= self.max_bytes:
+            return True
+        return bool(self.max_age_seconds) and time.time() - self.opened_at >= self.max_age_seconds
+
+    def rotate(self):
+        self.stream.close()
+        suffix = time.strftime("%Y%m%d-%H%M%S", time.localtime())
+        rotated = self.filename.with_name(f"{self.filename.name}.{suffix}")
+        counter = 1
+        while rotated.exists() or rotated.with_name(rotated.name + ".gz").exists():
+            rotated = self.filename.with_name(f"{self.filename.name}.{suffix}-{counter}")
+            counter += 1
+        self.filename.rename(rotated)
+        self._open()
+
+        if self.compress:
+            _get_compressor().submit(_compress_and_prune, rotated, self.filename, self.backup_count)
+        else:
+            _prune(self.filename, self.backup_count)
+
+    def emit(self, record: logging.LogRecord):
+        self.emit_batch([record])
+
+    def emit_batch(self, records: list[logging.LogRecord]):
+        lines = []
+        for record in records:
+            if not self.filter(record):
+                continue
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        data = "\n".join(lines) + "\n"
+        with self.lock:
+            self.stream.write(data)
+            self.stream.flush()
+            self.size += len(data.encode(self.encoding)) if not data.isascii() else len(data)
+            if self._should_rotate():
+                self.rotate()
+
+    def reopen(self):
+        """Открывает файл заново после close (повторный цикл lifespan)."""
+        with self.lock:
+            if self.stream.closed:
+                self._open()
+
+    def close(self):
+        with self.lock:
+            if self.stream and not self.stream.closed:
+                self.stream.flush()
+                self.stream.close()
+        super().close()
+
+
+class QueuedLogWriter:
+    """
+    Ограниченная очередь записей и фоновый поток, который сбрасывает их в обработчики пачками.
+    Запрос платит только за постановку в очередь. При переполнении запись отбрасывается
+    и учитывается в dropped: enqueue вызывается из event loop, и ожидание места
+    остановило бы все запросы воркера, а не только логируемый. Остановленный писатель
+    перезапускается первой же новой записью: после stop_log_writers приложение может стартовать снова.
+    """
+
+    def __init__(self, name: str, handlers: list[logging.Handler], max_size: int = 10000,
+                 batch_size: int = 256, flush_interval: float = 0.5):
+        self.name = name
+        self.handlers = handlers
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+
+    def start(self):
+        with self._lock:
+            self._stopped = False
+            for handler in self.handlers:
+                if isinstance(handler, BatchFileHandler):
+                    handler.reopen()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"log-writer-{self.name}", daemon=True)
+                self._thread.start()
+            _writers[self.name] = self
+
+    def enqueue(self, record: logging.LogRecord) -> bool:
+        if self._stopped:
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def _next_batch(self) -> tuple[list, bool]:
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return [], False
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list[logging.LogRecord]):
+        for handler in self.handlers:
+            try:
+                if isinstance(handler, BatchFileHandler):
+                    handler.emit_batch(batch)
+                else:
+                    for record in batch:
+                        handler.handle(record)
+            except Exception as e:
+                logger.error(f"Request log write failed: {e}")
+        self.written += len(batch)
+        self.batches += 1
+
+    def stop(self, timeout: float = 5.0):
+        """Дописывает всё, что уже в очереди, и останавливает поток."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            deadline = time.monotonic() + timeout
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning("Request log queue is full, pending records are lost on shutdown")
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._thread = None
+        self._stopped = True
+        for handler in self.handlers:
+            handler.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "max_size": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+        }
+
+
+def get_log_writer_stats() -> dict:
+    return {name: writer.stats() for name, writer in _writers.items()}
+
+
+def stop_log_writers():
+    """
+    Дописывает очереди всех писателей и закрывает их файлы.
+    Писатели остаются у своих владельцев и перезапускаются при следующей записи.
+    """
+    global _compressor
+    for name in list(_writers):
+        writer = _writers.pop(name)
+        writer.stop()
+        for handler in writer.handlers:
+            handler.close()
+    with _compressor_lock:
+        if _compressor is not None:
+            _compressor.shutdown(wait=True)
+            _compressor = None
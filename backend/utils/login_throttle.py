@@ -0,0 +1,138 @@
+# backend.utils.login_throttle
+import logging
+import os
+from functools import lru_cache
+from redis.asyncio import Redis
+from redis.exceptions import NoScriptError
+from backend.utils.circuit_breaker import CircuitBreaker
+from backend.utils.rate_limiter import REDIS_ERRORS, get_redis_breaker
+from backend.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Конфигурация защиты логина от перебора
+LOGIN_THROTTLE_LOGIN_THRESHOLD = int(os.getenv("LOGIN_THROTTLE_LOGIN_THRESHOLD") or 5)
+LOGIN_THROTTLE_IP_THRESHOLD = int(os.getenv("LOGIN_THROTTLE_IP_THRESHOLD") or 50)
+LOGIN_THROTTLE_BASE_DELAY_MS = int(os.getenv("LOGIN_THROTTLE_BASE_DELAY_MS") or 1000)
+LOGIN_THROTTLE_MAX_DELAY_MS = int(os.getenv("LOGIN_THROTTLE_MAX_DELAY_MS") or 15 * 60 * 1000)
+LOGIN_THROTTLE_WINDOW_SECONDS = int(os.getenv("LOGIN_THROTTLE_WINDOW_SECONDS") or 15 * 60)
+
+# Оставшееся время блокировки (мс) по всем переданным ключам
+CHECK_SCRIPT = """
+local wait = 0
+for i = 1, #KEYS do
+    local ttl = redis.call("PTTL", KEYS[i])
+    if ttl > wait then
+        wait = ttl
+    end
+end
+return wait
+"""
+
+# Учёт неудачной попытки: после порога блокировка растёт экспоненциально
+FAILURE_SCRIPT = """
+local function fail(counter_key, lock_key, threshold)
+    local count = redis.call("INCR", counter_key)
+    redis.call("EXPIRE", counter_key, ARGV[1])
+    if count < threshold then
+        return 0
+    end
+    local delay = math.min(tonumber(ARGV[4]) * 2 ^ (count - threshold), tonumber(ARGV[5]))
+    delay = math.floor(delay)
+    redis.call("SET", lock_key, 1, "PX", delay)
+    return delay
+end
+local login_delay = fail(KEYS[1], KEYS[2], tonumber(ARGV[2]))
+local ip_delay = fail(KEYS[3], KEYS[4], tonumber(ARGV[3]))
+return math.max(login_delay, ip_delay)
+"""
+
+
+class LoginThrottle:
+    """
+    Счётчик неудачных входов по логину и по IP с экспоненциальной задержкой.
+    Проверка выполняется до обращения к БД и bcrypt. При недоступности Redis
+    защита не блокирует вход (fail-open), а только пишет предупреждение.
+    """
+
+    def __init__(self, redis: Redis, breaker: CircuitBreaker | None = None):
+        self._redis = redis
+        self._breaker = breaker or CircuitBreaker("redis")
+        self._shas: dict[str, str] = {}
+
+    async def _load_script(self, script: str) -> str:
+        if script not in self._shas:
+            self._shas[script] = await self._redis.script_load(script)
+        return self._shas[script]
+
+    @staticmethod
+    def _keys(login: str, ip_address: str) -> dict:
+        return {
+            "login_counter": f"login_throttle:fail:login:{login}",
+            "login_lock": f"login_throttle:lock:login:{login}",
+            "ip_counter": f"login_throttle:fail:ip:{ip_address}",
+            "ip_lock": f"login_throttle:lock:ip:{ip_address}",
+        }
+
+    async def _evalsha(self, script: str, keys: list[str], *args) -> int:
+        try:
+            sha = await self._load_script(script)
+            try:
+                result = int(await self._redis.evalsha(sha, len(keys), *keys, *args))
+            except NoScriptError:
+                # Redis перезапущен или выполнен SCRIPT FLUSH: загружаем скрипт заново
+                self._shas.pop(script, None)
+                sha = await self._load_script(script)
+                result = int(await self._redis.evalsha(sha, len(keys), *keys, *args))
+        except REDIS_ERRORS:
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+        return result
+
+    async def retry_after_ms(self, login: str, ip_address: str) -> int:
+        """Сколько миллисекунд ещё действует блокировка (0 — вход разрешён)."""
+        # Пока цепь разомкнута, не ждём таймаутов Redis на каждом логине
+        if not self._breaker.allow_request():
+            return 0
+        keys = self._keys(login, ip_address)
+        try:
+            return await self._evalsha(CHECK_SCRIPT, [keys["login_lock"], keys["ip_lock"]])
+        except Exception as e:
+            logger.warning(f"Login throttle check skipped: {e}")
+            return 0
+
+    async def record_failure(self, login: str, ip_address: str) -> int:
+        if not self._breaker.allow_request():
+            return 0
+        keys = self._keys(login, ip_address)
+        try:
+            return await self._evalsha(
+                FAILURE_SCRIPT,
+                [keys["login_counter"], keys["login_lock"], keys["ip_counter"], keys["ip_lock"]],
+                str(LOGIN_THROTTLE_WINDOW_SECONDS),
+                str(LOGIN_THROTTLE_LOGIN_THRESHOLD),
+                str(LOGIN_THROTTLE_IP_THRESHOLD),
+                str(LOGIN_THROTTLE_BASE_DELAY_MS),
+                str(LOGIN_THROTTLE_MAX_DELAY_MS),
+            )
+        except Exception as e:
+            logger.warning(f"Login throttle failure not recorded: {e}")
+            return 0
+
+    async def record_success(self, login: str, ip_address: str):
+        if not self._breaker.allow_request():
+            return
+        keys = self._keys(login, ip_address)
+        try:
+            await self._redis.delete(keys["login_counter"], keys["login_lock"])
+        except REDIS_ERRORS as e:
+            self._breaker.record_failure()
+            logger.warning(f"Login throttle reset failed: {e}")
+            return
+        self._breaker.record_success()
+
+
+@lru_cache
+def get_login_throttle() -> LoginThrottle:
+    return LoginThrottle(get_redis(), get_redis_breaker())
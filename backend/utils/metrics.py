@@ -0,0 +1,319 @@
+# backend.utils.metrics
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Каталог снапшотов для нескольких воркеров: каждый процесс пишет {pid}.json,
+# /metrics суммирует все файлы. Каталог нужно очищать перед запуском сервера
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+METRICS_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("METRICS_SNAPSHOT_INTERVAL_SECONDS") or 5)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        # Последний элемент - корзина +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    """
+    Метрика с метками. Обновления выполняются в потоке event loop без блокировок:
+    дочерний объект для набора меток создаётся один раз и дальше только инкрементируется.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _dump_value(self, child):
+        return child.value
+
+    def dump(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(key), self._dump_value(child)] for key, child in self._children.items()],
+        }
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными корзинами: observe - бинарный поиск и три инкремента."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets if not math.isinf(bound)))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _dump_value(self, child):
+        return {"counts": list(child.counts), "sum": child.sum, "count": child.count}
+
+    def dump(self) -> dict:
+        return {**super().dump(), "buckets": list(self.buckets)}
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._callbacks = []
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+
+    def add_callback(self, callback):
+        """Функция, обновляющая датчики (пулы соединений и т.п.) перед каждым снапшотом."""
+        self._callbacks.append(callback)
+
+    def snapshot(self) -> dict:
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Metrics callback {callback.__name__} failed: {e}")
+        return {name: metric.dump() for name, metric in self._metrics.items()}
+
+    def write_snapshot(self, directory: str):
+        _write_snapshot_file(directory, self.snapshot())
+
+    def collect(self) -> dict:
+        if not METRICS_MULTIPROC_DIR:
+            return self.snapshot()
+        return _write_and_merge(METRICS_MULTIPROC_DIR, self.snapshot())
+
+    def render(self) -> str:
+        return render_text(self.collect())
+
+    async def render_async(self) -> str:
+        """
+        Для /metrics: снапшот снимается в event loop, а запись и чтение файлов
+        воркеров (METRICS_MULTIPROC_DIR) и форматирование - в отдельном потоке.
+        """
+        snapshot = self.snapshot()
+        if not METRICS_MULTIPROC_DIR:
+            return render_text(snapshot)
+        return await asyncio.to_thread(
+            lambda: render_text(_write_and_merge(METRICS_MULTIPROC_DIR, snapshot))
+        )
+
+
+def _write_snapshot_file(directory: str, snapshot: dict):
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    data = json.dumps({"pid": os.getpid(), "time": time.time(), "metrics": snapshot})
+    # Запись через временный файл: читатель никогда не увидит половину снапшота
+    temporary = path / f".{os.getpid()}.json.tmp"
+    temporary.write_text(data, encoding="utf-8")
+    os.replace(temporary, path / f"{os.getpid()}.json")
+
+
+def _write_and_merge(directory: str, snapshot: dict) -> dict:
+    _write_snapshot_file(directory, snapshot)
+    return merge_snapshots(_read_snapshots(directory))
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshots(directory: str) -> list[dict]:
+    snapshots = []
+    for path in Path(directory).glob("*.json"):
+        try:
+            snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping metrics snapshot {path.name}: {e}")
+    return snapshots
+
+
+def merge_snapshots(snapshots: list[dict]) -> dict:
+    """
+    Суммирует снапшоты воркеров: счётчики и гистограммы складываются всегда,
+    датчики - только для живых процессов (соединения умершего воркера уже закрыты).
+    """
+    merged: dict[str, dict] = {}
+    for snapshot in snapshots:
+        alive = _pid_alive(snapshot.get("pid", 0))
+        for name, metric in snapshot["metrics"].items():
+            if metric["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    target["samples"][key] = {
+                        "counts": [a + b for a, b in zip(current["counts"], value["counts"])],
+                        "sum": current["sum"] + value["sum"],
+                        "count": current["count"] + value["count"],
+                    }
+                else:
+                    target["samples"][key] = current + value
+    for metric in merged.values():
+        metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_text(metrics: dict) -> str:
+    """Текстовый формат Prometheus 0.0.4."""
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for values, value in metric["samples"]:
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], math.inf], value["counts"]):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{name}_bucket{_labels(names, values, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, values)} {_number(value['sum'])}")
+            lines.append(f"{name}_count{_labels(names, values)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+async def _snapshot_loop(directory: str, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_write_snapshot_file, directory, REGISTRY.snapshot())
+        except Exception as e:
+            logger.warning(f"Metrics snapshot failed: {e}")
+
+
+def start_snapshot_writer() -> asyncio.Task | None:
+    """Периодически сохраняет снапшот воркера, чтобы /metrics в любом воркере видел остальные."""
+    if not METRICS_MULTIPROC_DIR:
+        return None
+    return asyncio.create_task(_snapshot_loop(METRICS_MULTIPROC_DIR, METRICS_SNAPSHOT_INTERVAL_SECONDS))
+
+
+async def stop_snapshot_writer(task: asyncio.Task | None):
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    # Последний снапшот: счётчики завершившегося воркера остаются в сумме
+    await asyncio.to_thread(_write_snapshot_file, METRICS_MULTIPROC_DIR, REGISTRY.snapshot())
+
+
+REGISTRY = MetricsRegistry()
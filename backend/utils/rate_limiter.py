@@ -1,35 +1,335 @@
+import asyncio
+import os
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import lru_cache
 from typing import Annotated
 import logging
 from fastapi import HTTPException, status, Request, Depends
 from redis.asyncio import Redis
+from redis.exceptions import NoScriptError, RedisError
+from backend.auth.jwt_token import decode_token
+from backend.utils.circuit_breaker import CircuitBreaker
+from backend.utils.client_ip import scope_client_ip
+from backend.utils.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
+# Поведение при недоступности Redis: local - лимит в памяти воркера,
+# open - пропускать все запросы, closed - отклонять все запросы
+FAILURE_MODE = (os.getenv("RATE_LIMITER_FAILURE_MODE") or "local").lower()
+REDIS_BREAKER_THRESHOLD = int(os.getenv("REDIS_BREAKER_THRESHOLD") or 3)
+REDIS_BREAKER_BASE_DELAY = float(os.getenv("REDIS_BREAKER_BASE_DELAY_SECONDS") or 1)
+REDIS_BREAKER_MAX_DELAY = float(os.getenv("REDIS_BREAKER_MAX_DELAY_SECONDS") or 30)
+LOCAL_FALLBACK_MAX_KEYS = int(os.getenv("RATE_LIMITER_LOCAL_MAX_KEYS") or 10000)
+REDIS_ERRORS = (RedisError, OSError, asyncio.TimeoutError)
+
+# Доля лимита, которую один воркер может держать локально в гибридном режиме
+HYBRID_ERROR_BOUND = float(os.getenv("RATE_LIMITER_HYBRID_ERROR_BOUND") or 0.05)
+HYBRID_MAX_KEYS = int(os.getenv("RATE_LIMITER_HYBRID_MAX_KEYS") or 10000)
+
 @lru_cache
-def get_redis() -> Redis:
-    return Redis(host="localhost", port=6379, decode_responses=False)
+def get_redis_breaker() -> CircuitBreaker:
+    """Общий размыкатель для всех обращений лимитеров к Redis."""
+    return CircuitBreaker("redis", REDIS_BREAKER_THRESHOLD, REDIS_BREAKER_BASE_DELAY, REDIS_BREAKER_MAX_DELAY)
+
+
+# Скрипты алгоритмов. Общий формат: ARGV[1] - текущее время (мс), ARGV[2] - лимит,
+# ARGV[3] - окно (мс); результат {limited, remaining, retry_after_ms}
+
+# Точный скользящий журнал: одна запись ZSET на запрос, память O(max_requests)
+SLIDING_LOG_SCRIPT = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+redis.call("ZREMRANGEBYSCORE", KEYS[1], 0, now - window)
+local current_count = redis.call("ZCARD", KEYS[1])
+if current_count >= limit then
+    local oldest = redis.call("ZRANGE", KEYS[1], 0, 0, "WITHSCORES")
+    local retry = window
+    if oldest[2] then
+        retry = tonumber(oldest[2]) + window - now
+    end
+    return {1, 0, retry}
+end
+redis.call("ZADD", KEYS[1], now, ARGV[4])
+redis.call("PEXPIRE", KEYS[1], window)
+return {0, limit - current_count - 1, 0}
+"""
+
+# Скользящее окно из двух счётчиков: текущий и предыдущий интервал (KEYS[1], KEYS[2])
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local elapsed = now % window
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+local estimate = previous * (window - elapsed) / window + current
+if estimate + 1 > limit then
+    local retry = window - elapsed
+    if previous > 0 and current + 1 <= limit then
+        retry = math.ceil(window - window * (limit - 1 - current) / previous - elapsed)
+    end
+    return {1, 0, math.max(retry, 1)}
+end
+redis.call("INCR", KEYS[1])
+redis.call("PEXPIRE", KEYS[1], window * 2)
+return {0, math.floor(limit - estimate - 1), 0}
+"""
+
+# GCRA: хранится только теоретическое время прихода (TAT) следующего запроса
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local interval = window / limit
+local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - window
+if now < allow_at then
+    return {1, 0, math.ceil(allow_at - now)}
+end
+redis.call("SET", KEYS[1], new_tat, "PX", math.ceil(new_tat - now))
+return {0, math.floor((window - (new_tat - now)) / interval), 0}
+"""
+
+ALGORITHMS = {
+    "sliding_log": SLIDING_LOG_SCRIPT,
+    "sliding_window": SLIDING_WINDOW_SCRIPT,
+    "gcra": GCRA_SCRIPT,
+}
+DEFAULT_ALGORITHM = "sliding_log"
+HYBRID_ALGORITHM = "hybrid"
+
+# Составной лимит: GCRA по каждому ключу, все измерения проверяются атомарно.
+# ARGV[1] - now_ms, далее пары (limit, window_ms) для каждого KEYS[i].
+# Квота списывается только если не сработало ни одно измерение.
+# Результат: {номер сработавшего измерения (0 - нет), retry_after_ms, remaining_1, ..., remaining_n}
+MULTI_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tats = {}
+local tripped = 0
+local retry = 0
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local tat = tonumber(redis.call("GET", KEYS[i]) or now)
+    if tat < now then
+        tat = now
+    end
+    tats[i] = tat
+    local allow_at = tat + window / limit - window
+    if now < allow_at then
+        if tripped == 0 then
+            tripped = i
+        end
+        retry = math.max(retry, math.ceil(allow_at - now))
+    end
+end
+local result = {tripped, retry}
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local interval = window / limit
+    local tat = tats[i]
+    if tripped == 0 then
+        tat = tat + interval
+        redis.call("SET", KEYS[i], tat, "PX", math.ceil(tat - now))
+    end
+    result[i + 2] = math.max(0, math.floor((window - (tat - now)) / interval))
+end
+return result
+"""
+MULTI_SCRIPT = "multi"
+_SCRIPTS = {**ALGORITHMS, MULTI_SCRIPT: MULTI_GCRA_SCRIPT}
+# Измерения составного лимита в порядке проверки
+DIMENSIONS = ("ip", "user", "route", "global")
+
+# Выдача квоты воркеру в фиксированном окне: KEYS[1] - счётчик окна,
+# ARGV[1] - лимит, ARGV[2] - размер партии, ARGV[3] - мс до конца окна;
+# результат {granted, retry_after_ms, unleased} - unleased: квота окна, ещё не выданная воркерам
+LEASE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local used = tonumber(redis.call("GET", KEYS[1]) or "0")
+local granted = math.min(tonumber(ARGV[2]), limit - used)
+if granted <= 0 then
+    return {0, redis.call("PTTL", KEYS[1]), 0}
+end
+redis.call("INCRBY", KEYS[1], granted)
+if used == 0 then
+    redis.call("PEXPIRE", KEYS[1], ARGV[3])
+end
+return {granted, 0, limit - used - granted}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    limited: bool
+    remaining: int
+    retry_after_ms: int
+
+
+@dataclass(frozen=True)
+class LimitSpec:
+    """Одно измерение составного лимита: name - метка для ответа, key - ключ счётчика."""
+    name: str
+    key: str
+    max_requests: int
+    window_seconds: int
+
+
+@dataclass
+class CompositeRateLimitResult:
+    limited: bool
+    tripped: str | None
+    remaining: dict[str, int]
+    retry_after_ms: int
+
+    def most_constrained(self) -> str | None:
+        """Измерение, определяющее заголовки ответа: сработавшее или с наименьшим остатком."""
+        if self.tripped is not None or not self.remaining:
+            return self.tripped
+        return min(self.remaining, key=self.remaining.get)
+
+
+def build_limit_specs(endpoint: str, ip_address: str, user: str | None,
+                      limits: dict[str, tuple[int, int]]) -> list[LimitSpec]:
+    """
+    limits: измерение -> (max_requests, window_seconds). Измерение user пропускается
+    для анонимных запросов, global общий для всех маршрутов.
+    """
+    keys = {
+        "ip": f"{endpoint}:ip:{ip_address}",
+        "user": f"{endpoint}:user:{user}" if user else None,
+        "route": f"{endpoint}:route",
+        "global": "global",
+    }
+    specs = []
+    for name in DIMENSIONS:
+        if name in limits and keys[name] is not None:
+            max_requests, window_seconds = limits[name]
+            specs.append(LimitSpec(name, keys[name], int(max_requests), int(window_seconds)))
+    return specs
+
+
+class LocalRateLimiter:
+    """
+    Скользящее окно из двух счётчиков в памяти воркера. Используется, пока Redis
+    недоступен: лимит считается отдельно в каждом воркере.
+    """
+
+    def __init__(self, max_keys: int = LOCAL_FALLBACK_MAX_KEYS):
+        self._max_keys = max_keys
+        # key -> [номер окна, счётчик текущего окна, счётчик предыдущего окна]
+        self._windows: dict[str, list[int]] = {}
+
+    def check(self, key: str, max_requests: int, window_seconds: int) -> RateLimitResult:
+        now_ms = int(time.time() * 1000)
+        window_ms = window_seconds * 1000
+        window = now_ms // window_ms
+
+        state = self._windows.get(key)
+        if state is None:
+            if len(self._windows) >= self._max_keys:
+                self._windows.clear()
+            state = self._windows[key] = [window, 0, 0]
+        elif state[0] != window:
+            previous = state[1] if state[0] == window - 1 else 0
+            state[:] = [window, 0, previous]
 
+        elapsed = now_ms % window_ms
+        estimate = state[2] * (window_ms - elapsed) / window_ms + state[1]
+        if estimate + 1 > max_requests:
+            return RateLimitResult(True, 0, window_ms - elapsed)
+        state[1] += 1
+        return RateLimitResult(False, int(max_requests - estimate - 1), 0)
 
-class RateLimiter:
-    def __init__(self, redis: Redis):
+
+class _RedisBackedLimiter:
+    """Общая часть лимитеров на Redis: размыкатель и деградация при сбоях."""
+
+    def __init__(self, redis: Redis, breaker: CircuitBreaker | None = None,
+                 fallback: LocalRateLimiter | None = None):
         self._redis = redis
-        self._lua_sha = None
-
-    async def _load_script(self):
-        if self._lua_sha is None:
-            script = """
-            redis.call("ZREMRANGEBYSCORE", KEYS[1], 0, ARGV[2])
-            local current_count = redis.call("ZCARD", KEYS[1])
-            if current_count >= tonumber(ARGV[3]) then
-                return 1
-            end
-            redis.call("ZADD", KEYS[1], ARGV[1], ARGV[4])
-            redis.call("EXPIRE", KEYS[1], ARGV[5])
-            return 0
-            """
-            self._lua_sha = await self._redis.script_load(script)
+        self._breaker = breaker or CircuitBreaker("redis")
+        self._fallback = fallback or LocalRateLimiter()
+
+    def _degraded(self, key: str, max_requests: int, window_seconds: int) -> RateLimitResult:
+        if FAILURE_MODE == "open":
+            return RateLimitResult(False, max_requests, 0)
+        if FAILURE_MODE == "closed":
+            return RateLimitResult(True, 0, max(1000, int(self._breaker.retry_after_seconds() * 1000)))
+        return self._fallback.check(key, max_requests, window_seconds)
+
+    def _redis_failed(self, error: Exception):
+        logger.warning(f"Rate limiter Redis call failed, using '{FAILURE_MODE}' mode: {error}")
+        self._breaker.record_failure()
+
+
+class RateLimiter(_RedisBackedLimiter):
+    def __init__(self, redis: Redis, breaker: CircuitBreaker | None = None,
+                 fallback: LocalRateLimiter | None = None):
+        super().__init__(redis, breaker, fallback)
+        self._shas: dict[str, str] = {}
+
+    async def _load_script(self, algorithm: str) -> str:
+        if algorithm not in self._shas:
+            self._shas[algorithm] = await self._redis.script_load(_SCRIPTS[algorithm])
+        return self._shas[algorithm]
+
+    async def _evalsha(self, algorithm: str, keys: list[str], args: list[str]):
+        sha = await self._load_script(algorithm)
+        try:
+            return await self._redis.evalsha(sha, len(keys), *keys, *args)
+        except NoScriptError:
+            # Redis перезапущен или выполнен SCRIPT FLUSH: загружаем скрипт заново один раз
+            self._shas.pop(algorithm, None)
+            sha = await self._load_script(algorithm)
+            return await self._redis.evalsha(sha, len(keys), *keys, *args)
+
+    @staticmethod
+    def _keys(algorithm: str, key: str, now_ms: int, window_ms: int) -> list[str]:
+        if algorithm == "sliding_log":
+            return [key]
+        if algorithm == "sliding_window":
+            bucket = now_ms // window_ms
+            return [f"{key}:sw:{bucket}", f"{key}:sw:{bucket - 1}"]
+        return [f"{key}:gcra"]
+
+    async def check(
+            self,
+            ip_address: str,
+            endpoint: str,
+            max_requests: int,
+            window_seconds: int,
+            algorithm: str = DEFAULT_ALGORITHM,
+    ) -> RateLimitResult:
+        key = f"rate_limiter:{endpoint}:{ip_address}"
+        if not self._breaker.allow_request():
+            return self._degraded(key, max_requests, window_seconds)
+
+        current_ms = int(time.time() * 1000)
+        window_ms = window_seconds * 1000
+        keys = self._keys(algorithm, key, current_ms, window_ms)
+        args = [str(current_ms), str(max_requests), str(window_ms)]
+        if algorithm == "sliding_log":
+            # Уникальный член ZSET, чтобы одновременные запросы не схлопывались
+            args.append(f"{current_ms}-{id(self)}-{int(time.time_ns()) & 0xFFFF}")
+
+        try:
+            limited, remaining, retry_after_ms = await self._evalsha(algorithm, keys, args)
+        except REDIS_ERRORS as e:
+            self._redis_failed(e)
+            return self._degraded(key, max_requests, window_seconds)
+
+        self._breaker.record_success()
+        return RateLimitResult(limited == 1, int(remaining), int(retry_after_ms))
 
     async def is_limited(
             self,
@@ -37,53 +337,250 @@ class RateLimiter:
             endpoint: str,
             max_requests: int,
             window_seconds: int,
+            algorithm: str = DEFAULT_ALGORITHM,
     ) -> bool:
-        await self._load_script()
+        result = await self.check(ip_address, endpoint, max_requests, window_seconds, algorithm)
+        return result.limited
+
+    def _degraded_many(self, limits: list[LimitSpec]) -> CompositeRateLimitResult:
+        tripped, retry_after_ms, remaining = None, 0, {}
+        for spec in limits:
+            result = self._degraded(f"rate_limiter:multi:{spec.key}", spec.max_requests, spec.window_seconds)
+            remaining[spec.name] = result.remaining
+            if result.limited:
+                tripped = tripped or spec.name
+                retry_after_ms = max(retry_after_ms, result.retry_after_ms)
+        return CompositeRateLimitResult(tripped is not None, tripped, remaining, retry_after_ms)
+
+    async def check_many(self, limits: list[LimitSpec]) -> CompositeRateLimitResult:
+        """
+        Все измерения (ip, user, route, global ...) проверяются одним EVALSHA.
+        Запрос засчитывается во все измерения, только если ни одно не превышено.
+        """
+        if not limits:
+            return CompositeRateLimitResult(False, None, {}, 0)
+        if not self._breaker.allow_request():
+            return self._degraded_many(limits)
 
-        key = f"rate_limiter:{endpoint}:{ip_address}"
         current_ms = int(time.time() * 1000)
-        window_start_ms = current_ms - (window_seconds * 1000)
-        unique_id = f"{current_ms}-{id(self)}-{int(time.time_ns()) & 0xFFFF}"
+        keys = [f"rate_limiter:multi:{spec.key}" for spec in limits]
+        args = [str(current_ms)]
+        for spec in limits:
+            args += [str(spec.max_requests), str(spec.window_seconds * 1000)]
 
         try:
-            result = await self._redis.evalsha(
-                self._lua_sha,
-                1,  # количество ключей
-                key,
-                str(current_ms),  # ARGV[1] - текущее время
-                str(window_start_ms),  # ARGV[2] - начало окна
-                str(max_requests),  # ARGV[3] - лимит
-                unique_id,  # ARGV[4] - уникальный ID
-                str(window_seconds),  # ARGV[5] - TTL
-            )
-            return result == 1
-        except Exception as e:
-            # fallback на повторную загрузку скрипта при ошибке
-            logger.warning(f"{e}")
-            self._lua_sha = None
-            return await self.is_limited(ip_address, endpoint, max_requests, window_seconds)
+            tripped, retry_after_ms, *remaining = await self._evalsha(MULTI_SCRIPT, keys, args)
+        except REDIS_ERRORS as e:
+            self._redis_failed(e)
+            return self._degraded_many(limits)
+
+        self._breaker.record_success()
+        tripped = int(tripped)
+        return CompositeRateLimitResult(
+            limited=tripped > 0,
+            tripped=limits[tripped - 1].name if tripped else None,
+            remaining={spec.name: int(value) for spec, value in zip(limits, remaining)},
+            retry_after_ms=int(retry_after_ms),
+        )
+
+
+class _Lease:
+    __slots__ = ("window", "tokens", "unleased", "blocked_until_ms", "lock")
+
+    def __init__(self):
+        self.window = -1
+        self.tokens = 0
+        # Квота окна, ещё не выданная ни одному воркеру (на момент последней партии)
+        self.unleased = 0
+        self.blocked_until_ms = 0
+        self.lock = asyncio.Lock()
+
+    def remaining(self) -> int:
+        return self.tokens + self.unleased
+
+
+class HybridRateLimiter(_RedisBackedLimiter):
+    """
+    Двухуровневый лимитер: воркер забирает из Redis квоту партиями и расходует её
+    локально, поэтому в Redis уходит один запрос на партию, а не на каждый запрос.
+    Превышения глобального лимита окна нет; недобор ограничен размером партии
+    (error_bound * max_requests) на воркер. Окно фиксированное. remaining - остаток
+    своей партии плюс ещё не выданная квота окна (без неизрасходованных партий других воркеров).
+    """
+
+    def __init__(self, redis: Redis, breaker: CircuitBreaker | None = None,
+                 fallback: LocalRateLimiter | None = None,
+                 error_bound: float = HYBRID_ERROR_BOUND, max_keys: int = HYBRID_MAX_KEYS):
+        super().__init__(redis, breaker, fallback)
+        self._error_bound = error_bound
+        self._max_keys = max_keys
+        self._lease_sha = None
+        # Порядок - от давно использованных к недавним: при переполнении вытесняются первые
+        self._leases: OrderedDict[str, _Lease] = OrderedDict()
+
+    async def _lease(self, key: str, max_requests: int, batch: int, ttl_ms: int) -> tuple[int, int, int]:
+        """(выдано, retry_after_ms, остаток окна в Redis после выдачи)"""
+        args = [str(max_requests), str(batch), str(ttl_ms)]
+        if self._lease_sha is None:
+            self._lease_sha = await self._redis.script_load(LEASE_SCRIPT)
+        try:
+            granted, retry_after_ms, unleased = await self._redis.evalsha(self._lease_sha, 1, key, *args)
+        except NoScriptError:
+            self._lease_sha = await self._redis.script_load(LEASE_SCRIPT)
+            granted, retry_after_ms, unleased = await self._redis.evalsha(self._lease_sha, 1, key, *args)
+        return int(granted), int(retry_after_ms), int(unleased)
+
+    def _prune(self, current_window: int):
+        if len(self._leases) < self._max_keys:
+            return
+        for key, lease in list(self._leases.items()):
+            if lease.window < current_window and not lease.lock.locked():
+                del self._leases[key]
+        # Много разных ключей в одном окне: вытесняем давно не использованные.
+        # Неизрасходованная квота вытесненного ключа теряется - это недобор, не превышение
+        for _ in range(len(self._leases)):
+            if len(self._leases) < self._max_keys:
+                break
+            key, lease = self._leases.popitem(last=False)
+            if lease.lock.locked():
+                self._leases[key] = lease
+
+    async def check(
+            self,
+            ip_address: str,
+            endpoint: str,
+            max_requests: int,
+            window_seconds: int,
+            error_bound: float | None = None,
+    ) -> RateLimitResult:
+        key = f"rate_limiter:{endpoint}:{ip_address}"
+        now_ms = int(time.time() * 1000)
+        window_ms = window_seconds * 1000
+        window = now_ms // window_ms
+
+        # Быстрый путь: квота уже выдана этому воркеру
+        lease = self._leases.get(key)
+        if lease is not None:
+            self._leases.move_to_end(key)
+        if lease is not None and lease.window == window:
+            if lease.tokens > 0:
+                lease.tokens -= 1
+                return RateLimitResult(False, lease.remaining(), 0)
+            if lease.blocked_until_ms > now_ms:
+                return RateLimitResult(True, 0, lease.blocked_until_ms - now_ms)
+
+        if lease is None:
+            self._prune(window)
+            lease = self._leases.setdefault(key, _Lease())
+
+        async with lease.lock:
+            # Пока ждали блокировку, квоту мог получить другой запрос
+            if lease.window != window:
+                lease.window, lease.tokens, lease.unleased, lease.blocked_until_ms = window, 0, 0, 0
+            if lease.tokens == 0 and lease.blocked_until_ms <= now_ms:
+                if not self._breaker.allow_request():
+                    return self._degraded(key, max_requests, window_seconds)
+                bound = self._error_bound if error_bound is None else error_bound
+                batch = max(1, int(max_requests * bound))
+                try:
+                    granted, retry_after_ms, unleased = await self._lease(
+                        f"{key}:hy:{window}", max_requests, batch, (window + 1) * window_ms - now_ms
+                    )
+                except REDIS_ERRORS as e:
+                    self._redis_failed(e)
+                    return self._degraded(key, max_requests, window_seconds)
+                self._breaker.record_success()
+                lease.tokens, lease.unleased = granted, unleased
+                lease.blocked_until_ms = now_ms + retry_after_ms if granted == 0 else 0
+
+            if lease.tokens > 0:
+                lease.tokens -= 1
+                return RateLimitResult(False, lease.remaining(), 0)
+            return RateLimitResult(True, 0, max(1, lease.blocked_until_ms - now_ms))
 
 
 @lru_cache
 def get_rate_limiter() -> RateLimiter:
-    return RateLimiter(get_redis())
+    return RateLimiter(get_redis(), get_redis_breaker())
+
+
+@lru_cache
+def get_hybrid_rate_limiter() -> HybridRateLimiter:
+    return HybridRateLimiter(get_redis(), get_redis_breaker())
 
 
+def rate_limiter_factory(endpoint: str, max_requests: int, window_seconds: int,
+                         detail: str = "Превышено количество запросов.", algorithm: str = DEFAULT_ALGORITHM,
+                         error_bound: float | None = None):
+    """
+    algorithm: sliding_log | sliding_window | gcra — проверка в Redis на каждый запрос;
+    hybrid — локальная квота с синхронизацией партиями (error_bound — доля лимита на партию).
+    """
+    hybrid = algorithm == HYBRID_ALGORITHM
+    if not hybrid and algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown rate limiting algorithm: {algorithm}")
+    limiter_dependency = get_hybrid_rate_limiter if hybrid else get_rate_limiter
 
-def rate_limiter_factory(endpoint: str, max_requests: int, window_seconds: int, detail: str = "Превышено количество запросов."):
     async def dependency(
             request: Request,
-            rate_limiter: Annotated[RateLimiter, Depends(get_rate_limiter)],
+            rate_limiter: Annotated[RateLimiter | HybridRateLimiter, Depends(limiter_dependency)],
     ):
-        ip_address = request.client.host
-        limited = await rate_limiter.is_limited(
-            ip_address, endpoint, max_requests, window_seconds
-        )
-        if limited:
+        ip_address = scope_client_ip(request.scope)
+        if hybrid:
+            result = await rate_limiter.check(
+                ip_address, endpoint, max_requests, window_seconds, error_bound
+            )
+        else:
+            result = await rate_limiter.check(
+                ip_address, endpoint, max_requests, window_seconds, algorithm
+            )
+        if result.limited:
             logger.info(f"ENDPOINT: {endpoint} went beyond the limit from {ip_address}")
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=detail
+                detail=detail,
+                headers={"Retry-After": str(-(-result.retry_after_ms // 1000))}
+            )
+
+    return dependency
+
+
+def bearer_user(authorization: str | None) -> str | None:
+    """Логин из заголовка Authorization для измерения user; невалидный токен - анонимный запрос."""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token).username
+    except HTTPException:
+        return None
+
+
+def multi_rate_limiter_factory(endpoint: str, limits: dict[str, tuple[int, int]],
+                               detail: str = "Превышено количество запросов."):
+    """
+    Составной лимит по нескольким измерениям за один вызов Redis.
+    limits: {"ip": (100, 60), "user": (300, 60), "route": (5000, 60), "global": (20000, 60)}
+    """
+    unknown = set(limits) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown rate limit dimensions: {', '.join(sorted(unknown))}")
+
+    async def dependency(
+            request: Request,
+            rate_limiter: Annotated[RateLimiter, Depends(get_rate_limiter)],
+    ):
+        ip_address = scope_client_ip(request.scope)
+        user = bearer_user(request.headers.get("authorization")) if "user" in limits else None
+        result = await rate_limiter.check_many(build_limit_specs(endpoint, ip_address, user, limits))
+        if result.limited:
+            logger.info(f"ENDPOINT: {endpoint} went beyond the '{result.tripped}' limit from {ip_address}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=detail,
+                headers={"Retry-After": str(-(-result.retry_after_ms // 1000))}
             )
 
-    return dependency
\ No newline at end of file
+    return dependency
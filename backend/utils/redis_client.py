@@ -0,0 +1,129 @@
+# backend.utils.redis_client
+import logging
+import os
+from functools import lru_cache
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.client import Pipeline
+from redis.asyncio.connection import UnixDomainSocketConnection
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from backend.utils.timing import span
+
+logger = logging.getLogger(__name__)
+
+# Конфигурация Redis: REDIS_UNIX_SOCKET имеет приоритет над host/port
+REDIS_HOST = os.getenv("REDIS_HOST") or "localhost"
+REDIS_PORT = int(os.getenv("REDIS_PORT") or 6379)
+REDIS_UNIX_SOCKET = os.getenv("REDIS_UNIX_SOCKET") or None
+REDIS_DB = int(os.getenv("REDIS_DB") or 0)
+REDIS_USERNAME = os.getenv("REDIS_USERNAME") or None
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS") or 50)
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT") or 1)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT") or 0.5)
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT") or 0.5)
+REDIS_HEALTH_CHECK_INTERVAL = float(os.getenv("REDIS_HEALTH_CHECK_INTERVAL") or 30)
+REDIS_RETRY_ATTEMPTS = int(os.getenv("REDIS_RETRY_ATTEMPTS") or 1)
+REDIS_PROTOCOL = int(os.getenv("REDIS_PROTOCOL") or 2)
+
+
+def _pool_kwargs() -> dict:
+    kwargs = {
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "timeout": REDIS_POOL_TIMEOUT,
+        "db": REDIS_DB,
+        "username": REDIS_USERNAME,
+        "password": REDIS_PASSWORD,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+        # Короткие повторы: дальше сбои обрабатывает размыкатель лимитеров
+        "retry": Retry(ExponentialBackoff(cap=0.1, base=0.01), REDIS_RETRY_ATTEMPTS),
+        "protocol": REDIS_PROTOCOL,
+        "decode_responses": False,
+    }
+    if REDIS_UNIX_SOCKET:
+        kwargs.update(connection_class=UnixDomainSocketConnection, path=REDIS_UNIX_SOCKET)
+    else:
+        kwargs.update(host=REDIS_HOST, port=REDIS_PORT)
+    return kwargs
+
+
+class CountingConnectionPool(BlockingConnectionPool):
+    """
+    Пул, сам считающий созданные и выданные соединения для /metrics:
+    внутренние списки redis-py между версиями меняются, переопределяемые методы - нет.
+    """
+
+    def __init__(self, **kwargs):
+        self._created = 0
+        self._leased = set()
+        super().__init__(**kwargs)
+
+    def reset(self):
+        super().reset()
+        self._created = 0
+        self._leased = set()
+
+    def make_connection(self):
+        self._created += 1
+        return super().make_connection()
+
+    def get_available_connection(self):
+        connection = super().get_available_connection()
+        self._leased.add(connection)
+        return connection
+
+    async def release(self, connection):
+        self._leased.discard(connection)
+        await super().release(connection)
+
+    def counts(self) -> tuple[int, int]:
+        """(занятые, свободные) соединения."""
+        in_use = len(self._leased)
+        return in_use, max(0, self._created - in_use)
+
+
+@lru_cache
+def get_redis_pool() -> CountingConnectionPool:
+    """Общий пул соединений: лимитеры, кеши и health используют одни и те же сокеты."""
+    pool = CountingConnectionPool(**_pool_kwargs())
+    target = REDIS_UNIX_SOCKET or f"{REDIS_HOST}:{REDIS_PORT}"
+    logger.info(f"Redis pool created: {target}, max {REDIS_MAX_CONNECTIONS} connections, RESP{REDIS_PROTOCOL}")
+    return pool
+
+
+class TimedRedis(Redis):
+    """Клиент, учитывающий время каждой команды в этапе redis для Server-Timing."""
+
+    async def execute_command(self, *args, **options):
+        with span("redis"):
+            return await super().execute_command(*args, **options)
+
+
+@lru_cache
+def get_redis() -> Redis:
+    return TimedRedis(connection_pool=get_redis_pool())
+
+
+def redis_pipeline(transaction: bool = False) -> Pipeline:
+    """Пакет команд за один сетевой обмен (transaction=True оборачивает его в MULTI/EXEC)."""
+    return get_redis().pipeline(transaction=transaction)
+
+
+def get_redis_pool_stats() -> dict:
+    pool = get_redis_pool()
+    in_use, idle = pool.counts()
+    return {
+        "max_connections": pool.max_connections,
+        "in_use": in_use,
+        "idle": idle,
+        "utilization": round(in_use / pool.max_connections, 4) if pool.max_connections else 0.0,
+    }
+
+
+async def close_redis():
+    if get_redis.cache_info().currsize:
+        await get_redis().aclose()
+    if get_redis_pool.cache_info().currsize:
+        await get_redis_pool().disconnect()
@@ -0,0 +1,17 @@
+# backend.utils.responses
+from fastapi import Response
+from pydantic import BaseModel
+
+
+def model_response(model: BaseModel, status_code: int = 200, headers: dict | None = None) -> Response:
+    """
+    JSON-ответ из уже собранной модели: один проход сериализатора pydantic-core сразу в байты.
+    Возврат Response минует повторную валидацию по response_model и jsonable_encoder FastAPI;
+    response_model маршрута остаётся только для документации.
+    """
+    return Response(
+        content=model.__pydantic_serializer__.to_json(model),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
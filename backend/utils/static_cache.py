@@ -0,0 +1,88 @@
+# backend.utils.static_cache
+import gzip
+import hashlib
+import logging
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Меньшие ответы не сжимаем: заголовки съедят выигрыш
+MIN_COMPRESS_SIZE = 512
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Accept-Encoding -> {кодировка: q}; кодировки с q=0 явно запрещены."""
+    codings = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def accepts(codings: dict[str, float], coding: str) -> bool:
+    return codings.get(coding, codings.get("*", 0.0)) > 0
+
+
+class CachedAsset:
+    """
+    Статический ответ в памяти: тело, заранее сжатые варианты (gzip, br при наличии brotli)
+    и сильный ETag для каждого варианта. Повторный запрос с If-None-Match получает 304.
+    """
+
+    def __init__(self, body: bytes, media_type: str):
+        self.media_type = media_type
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Представления различаются байтами, поэтому у каждого свой сильный ETag
+        self.variants: dict[str, tuple[bytes, str]] = {"identity": (body, f'"{digest}"')}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants["gzip"] = (compressed, f'"{digest}-gzip"')
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.variants["br"] = (compressed, f'"{digest}-br"')
+        self.etags = frozenset(etag for _, etag in self.variants.values())
+
+    def _not_modified(self, if_none_match: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return not tags.isdisjoint(self.etags)
+
+    def _choose(self, accept_encoding: str) -> str:
+        codings = parse_accept_encoding(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepts(codings, coding):
+                return coding
+        return "identity"
+
+    def response(self, request: Request, cache_control: str = "no-cache") -> Response:
+        coding = self._choose(request.headers.get("accept-encoding", ""))
+        body, etag = self.variants[coding]
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+        if self._not_modified(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+    def stats(self) -> dict:
+        return {coding: len(body) for coding, (body, _) in self.variants.items()}
@@ -0,0 +1,83 @@
+# backend.utils.timing
+import os
+import time
+from contextvars import ContextVar
+
+# Разбивка времени запроса по этапам (БД, Redis, bcrypt, ...) в заголовке Server-Timing
+SERVER_TIMING_ENABLED = (os.getenv("SERVER_TIMING_ENABLED") or "false").lower() in ("1", "true", "yes")
+
+# Этапы текущего запроса: имя -> [суммарная длительность, мс; количество вызовов].
+# None вне запроса или при выключенном Server-Timing - тогда span() ничего не делает
+_spans: ContextVar[dict | None] = ContextVar("server_timing_spans", default=None)
+
+
+class _Span:
+    __slots__ = ("spans", "name", "start")
+
+    def __init__(self, spans: dict, name: str):
+        self.spans = spans
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        total = self.spans.get(self.name)
+        if total is None:
+            self.spans[self.name] = [elapsed_ms, 1]
+        else:
+            total[0] += elapsed_ms
+            total[1] += 1
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    """
+    with span("db"): ... - добавляет длительность блока к этапу текущего запроса.
+    Вне запроса с включённым Server-Timing стоит одного чтения ContextVar.
+    """
+    spans = _spans.get()
+    if spans is None:
+        return _NOOP_SPAN
+    return _Span(spans, name)
+
+
+def start_request_timing() -> tuple[dict, object]:
+    spans = {}
+    return spans, _spans.set(spans)
+
+
+def end_request_timing(token):
+    _spans.reset(token)
+
+
+def server_timing_header(spans: dict, total_ms: float | None = None) -> str:
+    entries = []
+    for name, (duration_ms, count) in spans.items():
+        entry = f"{name};dur={duration_ms:.2f}"
+        if count > 1:
+            entry += f';desc="{count} calls"'
+        entries.append(entry)
+    if total_ms is not None:
+        entries.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(entries)
+
+
+def spans_as_dict(spans: dict) -> dict:
+    """Этапы для структурированного лога: имя -> длительность, мс."""
+    return {name: round(duration_ms, 2) for name, (duration_ms, _) in spans.items()}
@@ -1,6 +1,8 @@
 # test.api.create_user
 from fastapi.testclient import TestClient
 from backend.main import app
+from backend.auth.hashing import get_password_hasher
+from backend.auth.user_check import invalidate_user_cache
 import pytest
 import uuid
 
@@ -84,6 +86,48 @@ def test_create_user_duplicate_login(client):
     response2 = client.post("/api/create_user", json=payload)
     assert response2.status_code == 409
 
+def test_create_user_duplicate_login_cold_cache(client):
+    """
+    Логина нет в кеше: bcrypt выполняется, INSERT упирается в уникальный индекс
+    и IntegrityError превращается в 409
+    """
+    login = get_unique_login()
+    payload = {
+        "login": login,
+        "password": "StrongPass123",
+        "role": "user"
+    }
+
+    response1 = client.post("/api/create_user", json=payload)
+    assert response1.status_code == 200
+
+    invalidate_user_cache(login)
+    submitted = get_password_hasher().stats()["submitted"]
+    response2 = client.post("/api/create_user", json=payload)
+    assert response2.status_code == 409
+    assert response2.json()["detail"] == "User with this login already exists"
+    # До INSERT дошли: пароль захеширован, а не отвергнут по кешу
+    assert get_password_hasher().stats()["submitted"] == submitted + 1
+
+def test_create_user_duplicate_login_cached(client):
+    """
+    Логин уже в кеше после входа: 409 без bcrypt и без обращения к БД
+    """
+    login = get_unique_login()
+    payload = {
+        "login": login,
+        "password": "StrongPass123",
+        "role": "user"
+    }
+
+    assert client.post("/api/create_user", json=payload).status_code == 200
+    assert client.post("/api/login", json={"login": login, "password": "StrongPass123"}).status_code == 200
+
+    submitted = get_password_hasher().stats()["submitted"]
+    response = client.post("/api/create_user", json=payload)
+    assert response.status_code == 409
+    assert get_password_hasher().stats()["submitted"] == submitted
+
 def test_create_user_with_empty_fields(client):
     """
     Тест с пустыми полями
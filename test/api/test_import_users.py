@@ -0,0 +1,80 @@
+# test.api.import_users
+from fastapi.testclient import TestClient
+from backend.main import app
+import pytest
+import json
+import uuid
+
+def get_unique_login():
+    """Генерирует уникальный логин для тестов"""
+    return f"testuser_{uuid.uuid4().hex[:8]}"
+
+@pytest.fixture(scope="function")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture(scope="function")
+def admin_headers(client):
+    """Импорт доступен только администратору: создаём его и берём токен"""
+    login = get_unique_login()
+    client.post("/api/create_user", json={"login": login, "password": "AdminPass123", "role": "admin"})
+    token = client.post("/api/login", json={"login": login, "password": "AdminPass123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_import_users_ndjson(client, admin_headers):
+    logins = [get_unique_login() for _ in range(3)]
+    body = "\n".join(json.dumps({"login": login, "password": "StrongPass123", "role": "user"}) for login in logins)
+
+    response = client.post("/api/import_users", content=body, headers={**admin_headers, "Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 3
+    assert data["duplicates"] == []
+
+def test_import_users_csv_reports_rows(client, admin_headers):
+    """
+    Дубликаты и ошибки валидации не прерывают импорт
+    """
+    login = get_unique_login()
+    body = (
+        "login,password,role\n"
+        f"{login},StrongPass123,user\n"
+        f"{login},StrongPass123,user\n"
+        f"{get_unique_login()},StrongPass123,hacker\n"
+    )
+
+    response = client.post("/api/import_users", content=body, headers={**admin_headers, "Content-Type": "text/csv"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert data["duplicates"] == [{"line": 3, "login": login}]
+    assert [error["line"] for error in data["errors"]] == [4]
+
+def test_import_users_unsupported_format(client, admin_headers):
+    response = client.post("/api/import_users", content="<users/>", headers={**admin_headers, "Content-Type": "application/xml"})
+
+    assert response.status_code == 415
+
+def test_import_users_csv_quoted_newline(client, admin_headers):
+    """
+    Поле в кавычках с переводом строки не разбивает запись
+    """
+    login = get_unique_login()
+    body = f'login,password,role\n{login},"Strong\nPass123",user\n{get_unique_login()},StrongPass123,user\n'
+
+    response = client.post("/api/import_users", content=body, headers={**admin_headers, "Content-Type": "text/csv"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["errors"] == []
+
+def test_import_users_requires_admin(client):
+    body = json.dumps({"login": get_unique_login(), "password": "StrongPass123", "role": "admin"})
+
+    response = client.post("/api/import_users", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 401
@@ -0,0 +1,43 @@
+# test.auth.conftest
+import asyncio
+import pytest
+from tortoise import Tortoise
+from tortoise.utils import get_schema_sql
+from backend.auth import user_check
+from backend.core import db_router
+
+REPLICA = "users_connection_replica_0"
+
+
+@pytest.fixture
+def run_with_db(tmp_path):
+    """Выполняет сценарий на SQLite; с replica=True чтения идут во вторую, пустую базу."""
+
+    def run_scenario(scenario, replica: bool = False):
+        connections = {"users_connection": f"sqlite://{tmp_path / 'primary.db'}"}
+        if replica:
+            connections[REPLICA] = f"sqlite://{tmp_path / 'replica.db'}"
+
+        async def run():
+            db_router.configure_replicas({"users_connection": [REPLICA] if replica else []})
+            await Tortoise.init({
+                "connections": connections,
+                "apps": {"users": {"models": ["backend.models.users"], "default_connection": "users_connection"}},
+                "routers": ["backend.core.db_router.ReplicaRouter"],
+            })
+            try:
+                await Tortoise.generate_schemas()
+                if replica:
+                    schema = get_schema_sql(Tortoise.get_connection("users_connection"), safe=True)
+                    await Tortoise.get_connection(REPLICA).execute_script(schema)
+                    db_router._replica_sets["users_connection"].set_health(REPLICA, True)
+                return await scenario()
+            finally:
+                await Tortoise.close_connections()
+                db_router.configure_replicas({})
+                db_router._recent_writes.clear()
+                user_check._user_cache.clear()
+
+        return asyncio.run(run())
+
+    return run_scenario
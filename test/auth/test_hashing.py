@@ -0,0 +1,86 @@
+# test.auth.hashing
+import asyncio
+from unittest import mock
+import pytest
+from fastapi import HTTPException
+from backend.auth import hashing
+from backend.auth.hashing import BCRYPT_CALIBRATION_KEY, PasswordHasher
+from backend.auth.user_check import get_password_hash, verify_password
+
+
+def test_hash_many_leaves_a_worker_for_single_hashes():
+    hasher = PasswordHasher("thread", 2, 64, rounds=4)
+
+    async def run():
+        bulk = asyncio.create_task(hasher.hash_many([f"password-{i}" for i in range(400)]))
+        await asyncio.sleep(0.01)
+        # Импорт занимает один воркер из двух, логин не ждёт его окончания
+        hashed = await hasher.hash("login-password")
+        assert not bulk.done()
+        assert hasher.stats()["max_pending_seen"] <= 2
+        return hashed, await bulk
+
+    hashed, bulk_hashed = asyncio.run(run())
+    hasher.shutdown()
+
+    assert verify_password("login-password", hashed)
+    assert len(bulk_hashed) == 400
+    assert verify_password("password-399", bulk_hashed[-1])
+
+
+def test_full_queue_rejects_with_503():
+    # Один воркер без очереди: вторая задача отклоняется сразу
+    hasher = PasswordHasher("thread", 1, 0, rounds=10)
+
+    async def run():
+        first = asyncio.create_task(hasher.hash("first"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as error:
+            await hasher.hash("second")
+        await first
+        return error.value
+
+    error = asyncio.run(run())
+    hasher.shutdown()
+
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "1"}
+    assert hasher.stats()["rejected"] == 1 and hasher.stats()["completed"] == 1
+
+
+def test_calibration_is_shared_through_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis()
+
+    async def run():
+        first = PasswordHasher("thread", 1, 0)
+        await first.calibrate()
+        ttl = await redis.ttl(BCRYPT_CALIBRATION_KEY)
+        # Второй воркер не измеряет сам, а берёт стоимость первого
+        second = PasswordHasher("thread", 1, 0)
+        with mock.patch("backend.auth.hashing._measure_hash_ms") as measure:
+            await second.calibrate()
+        # Параллельный воркер успел сохранить другую стоимость: SET NX её не перезаписывает
+        await redis.set(BCRYPT_CALIBRATION_KEY, 4)
+        raced = await hashing._store_shared_rounds(5)
+        first.shutdown()
+        return first.rounds, second.rounds, measure.called, raced, ttl
+
+    with mock.patch("backend.auth.hashing.get_redis", return_value=redis), \
+            mock.patch.multiple("backend.auth.hashing", BCRYPT_MIN_ROUNDS=4, BCRYPT_MAX_ROUNDS=5,
+                                BCRYPT_TARGET_MS=10000):
+        first, second, measured, raced, ttl = asyncio.run(run())
+
+    assert first == second == 5
+    assert not measured
+    assert raced == 4
+    assert 0 < ttl <= hashing.BCRYPT_CALIBRATION_TTL_SECONDS
+
+
+def test_needs_rehash_only_upwards():
+    hasher = PasswordHasher("thread", 1, 0, rounds=5)
+
+    assert hasher.needs_rehash(get_password_hash("password", 4))
+    assert not hasher.needs_rehash(get_password_hash("password", 5))
+    assert not hasher.needs_rehash(get_password_hash("password", 6))
+    assert not hasher.needs_rehash("not-a-bcrypt-hash")
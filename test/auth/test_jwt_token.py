@@ -0,0 +1,46 @@
+# test.auth.jwt_token
+import time
+from unittest import mock
+import pytest
+from jose import jwt
+from backend.auth import jwt_token
+from backend.auth.jwt_token import clear_token_cache, decode_token
+
+SECRET = "test-secret"
+
+
+@pytest.fixture(autouse=True)
+def secret_key():
+    with mock.patch("backend.auth.jwt_token.SECRET_KEY", SECRET):
+        clear_token_cache()
+        yield
+        clear_token_cache()
+
+
+def decode_calls(token: str, repeat: int, monotonic: float | None = None) -> int:
+    """Сколько раз подпись реально проверялась за repeat вызовов decode_token."""
+    with mock.patch("backend.auth.jwt_token.jwt.decode", wraps=jwt.decode) as decode:
+        if monotonic is None:
+            for _ in range(repeat):
+                decode_token(token)
+        else:
+            with mock.patch("backend.utils.ttl_cache.time.monotonic", return_value=monotonic):
+                for _ in range(repeat):
+                    decode_token(token)
+        return decode.call_count
+
+
+def test_cached_token_expires_with_its_exp():
+    token = jwt.encode({"sub": "alice", "role": "user", "exp": int(time.time()) + 30}, SECRET, algorithm="HS256")
+
+    assert decode_calls(token, 3) == 1
+    assert decode_token(token).username == "alice"
+    # Запись живёт не дольше exp токена
+    assert decode_calls(token, 1, time.monotonic() + 31) == 1
+
+
+def test_token_without_exp_is_not_cached():
+    token = jwt.encode({"sub": "alice", "role": "user"}, SECRET, algorithm="HS256")
+
+    assert decode_calls(token, 3) == 3
+    assert jwt_token.get_token_cache_stats()["size"] == 0
@@ -0,0 +1,37 @@
+# test.auth.user_auth
+import asyncio
+from unittest import mock
+import pytest
+from fastapi import HTTPException
+from backend.auth import user_auth
+from backend.auth.hashing import PasswordHasher
+from backend.auth.user_check import get_hash_rounds, get_password_hash
+from backend.models.users import User
+
+
+def test_login_rehashes_cheaper_passwords_in_background(run_with_db):
+    hasher = PasswordHasher("thread", 1, 4, rounds=5)
+
+    async def scenario():
+        await User.create(login="alice", hashed_password=get_password_hash("secret", 4))
+
+        with pytest.raises(HTTPException):
+            await user_auth.authenticate_user("alice", "wrong")
+        # Неверный пароль не запускает перехеширование
+        assert not user_auth._rehash_tasks
+
+        await user_auth.authenticate_user("alice", "secret")
+        await asyncio.gather(*user_auth._rehash_tasks)
+        upgraded = (await User.get(login="alice")).hashed_password
+
+        # Хеш уже с текущей стоимостью: повторный вход ничего не перехеширует
+        await user_auth.authenticate_user("alice", "secret")
+        scheduled_again = bool(user_auth._rehash_tasks)
+        return upgraded, scheduled_again
+
+    with mock.patch("backend.auth.user_auth.get_password_hasher", return_value=hasher):
+        upgraded, scheduled_again = run_with_db(scenario)
+    hasher.shutdown()
+
+    assert get_hash_rounds(upgraded) == 5
+    assert not scheduled_again
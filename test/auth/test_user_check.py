@@ -0,0 +1,67 @@
+# test.auth.user_check
+import asyncio
+from unittest import mock
+import pytest
+from backend.auth import user_check
+from backend.auth.add_users import create_user
+from backend.auth.hashing import PasswordHasher
+from backend.core import db_router
+from backend.models.users import User
+
+def test_replica_miss_rechecked_on_primary_only_for_recent_writes(run_with_db):
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis()
+
+    async def scenario():
+        # Пользователь есть только на основном сервере: реплика отстаёт
+        await User.create(login="alice", hashed_password="x")
+        missing = await user_check.get_user_by_login("alice")
+
+        # Отметку поставил другой воркер: локальной копии нет
+        await db_router.remember_write(user_check.user_write_key("alice"))
+        db_router._recent_writes.clear()
+        user_check.invalidate_user_cache("alice")
+        found = await user_check.get_user_by_login("alice")
+        return missing, found
+
+    with mock.patch("backend.core.db_router.get_redis", return_value=redis), \
+            mock.patch("backend.core.db_router.redis_pipeline", side_effect=lambda: redis.pipeline(transaction=False)):
+        missing, found = run_with_db(scenario, replica=True)
+
+    # Без отметки промах реплики не повторяется на основном сервере
+    assert missing is None
+    assert found is not None and found.login == "alice"
+
+
+def test_negative_entry_is_cached_until_user_is_created(run_with_db):
+    hasher = PasswordHasher("thread", 1, 4, rounds=4)
+
+    async def scenario():
+        assert await user_check.get_user_by_login("bob") is None
+        queries = user_check.get_user_cache_stats()["db_queries"]
+        # Отсутствие логина закешировано: повторный промах не идёт в БД
+        assert await user_check.get_user_by_login("bob") is None
+        assert user_check.get_user_cache_stats()["db_queries"] == queries
+
+        await create_user({"login": "bob", "password": "secret", "role": "user"})
+        return await user_check.get_user_by_login("bob")
+
+    with mock.patch("backend.auth.add_users.get_password_hasher", return_value=hasher):
+        user = run_with_db(scenario)
+    hasher.shutdown()
+
+    assert user is not None and user.login == "bob"
+
+
+def test_concurrent_lookups_share_one_query(run_with_db):
+    async def scenario():
+        await User.create(login="carol", hashed_password="x")
+        queries = user_check.get_user_cache_stats()["db_queries"]
+        users = await asyncio.gather(*(user_check.get_user_by_login("carol") for _ in range(5)))
+        return users, user_check.get_user_cache_stats()["db_queries"] - queries, user_check._inflight
+
+    users, queries, inflight = run_with_db(scenario)
+
+    assert queries == 1
+    assert all(user is users[0] for user in users) and users[0].login == "carol"
+    assert not inflight
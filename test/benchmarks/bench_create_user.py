@@ -0,0 +1,116 @@
+# test.benchmarks.bench_create_user
+"""
+Пропускная способность регистрации: старый exists() + create() против одного INSERT.
+
+Нужны .env и работающий PostgreSQL:
+    python -m test.benchmarks.bench_create_user --users 1000 --concurrency 50 --duplicates 0.2
+
+Каждый вариант замеряется дважды: с занятыми логинами в кеше (пользователи недавно входили)
+и с пустым кешем, когда 409 даёт только уникальный индекс после bcrypt и INSERT.
+
+По умолчанию bcrypt запускается с минимальной стоимостью (4), чтобы в замере
+доминировали обращения к БД; --real-hash включает рабочую стоимость.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fastapi import HTTPException
+from tortoise import Tortoise
+from backend.auth import add_users, hashing
+from backend.auth.user_check import get_user_by_login, get_user_cache_stats, invalidate_user_cache
+from backend.lifespan import init_db
+from backend.models.users import User as Model
+
+LOGIN_PREFIX = "bench_"
+PASSWORD = "BenchPass123"
+
+
+async def legacy_create_user(user_data: dict) -> bool:
+    """Реализация до изменений: два обращения к БД и bcrypt даже для занятого логина."""
+    if await Model.filter(login=user_data["login"]).exists():
+        raise HTTPException(status_code=409, detail="User with this login already exists")
+
+    hashed_password = await hashing.get_password_hasher().hash(user_data["password"][:72])
+    await Model.create(
+        login=user_data["login"],
+        role=user_data["role"],
+        hashed_password=hashed_password
+    )
+    return True
+
+
+def make_logins(count: int, duplicates: float, existing: list[str]) -> list[str]:
+    duplicate_count = int(count * duplicates)
+    logins = [f"{LOGIN_PREFIX}{uuid.uuid4().hex[:12]}" for _ in range(count - duplicate_count)]
+    logins += [existing[i % len(existing)] for i in range(duplicate_count)]
+    return logins
+
+
+async def run_case(name: str, create, logins: list[str], concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    conflicts = 0
+    hashes_before = hashing.get_password_hasher().stats()["submitted"]
+
+    async def register(login: str):
+        nonlocal conflicts
+        async with semaphore:
+            try:
+                await create({"login": login, "password": PASSWORD, "role": "user"})
+            except HTTPException as e:
+                if e.status_code != 409:
+                    raise
+                conflicts += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(register(login) for login in logins))
+    elapsed = time.perf_counter() - start
+
+    hashes = hashing.get_password_hasher().stats()["submitted"] - hashes_before
+    print(
+        f"{name:<29} {len(logins) / elapsed:10.1f} req/s  "
+        f"{elapsed * 1000 / len(logins):8.2f} ms/req  conflicts={conflicts}  bcrypt_calls={hashes}"
+    )
+
+
+async def main(args: argparse.Namespace):
+    if args.real_hash:
+        await hashing.get_password_hasher().calibrate()
+    else:
+        hashing.get_password_hasher().rounds = 4
+
+    await init_db()
+    try:
+        # Пользователи с занятыми логинами; в "тёплом" прогоне они есть в кеше, как после входа
+        existing = [f"{LOGIN_PREFIX}{uuid.uuid4().hex[:12]}" for _ in range(max(1, args.users // 10))]
+        for login in existing:
+            await add_users.create_user({"login": login, "password": PASSWORD, "role": "user"})
+
+        print(f"users={args.users} concurrency={args.concurrency} duplicates={args.duplicates:.0%}")
+        for cache in ("warm", "cold"):
+            for name, create in (("exists() + create()", legacy_create_user), ("single INSERT", add_users.create_user)):
+                if cache == "warm":
+                    for login in existing:
+                        await get_user_by_login(login)
+                else:
+                    for login in existing:
+                        invalidate_user_cache(login)
+                await run_case(f"{name} [{cache}]", create,
+                               make_logins(args.users, args.duplicates, existing), args.concurrency)
+        print(f"user cache: {get_user_cache_stats()}")
+    finally:
+        await Model.filter(login__startswith=LOGIN_PREFIX).delete()
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк регистрации пользователей")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="Доля запросов с уже занятым логином")
+    parser.add_argument("--real-hash", action="store_true", help="Хешировать с рабочей стоимостью bcrypt")
+    asyncio.run(main(parser.parse_args()))
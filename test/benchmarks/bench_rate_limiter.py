@@ -0,0 +1,68 @@
+# test.benchmarks.bench_rate_limiter
+"""
+Сравнение алгоритмов RateLimiter: пропускная способность и память Redis на ключ.
+
+Нужен работающий Redis (используется отдельная БД, по умолчанию 15 — она очищается):
+    python -m test.benchmarks.bench_rate_limiter --keys 200 --requests 20000 --limit 10000
+"""
+import argparse
+import asyncio
+import time
+
+from redis.asyncio import Redis
+from backend.utils.rate_limiter import ALGORITHMS, RateLimiter
+
+
+async def run_algorithm(redis: Redis, algorithm: str, args: argparse.Namespace):
+    await redis.flushdb()
+    limiter = RateLimiter(redis)
+    memory_before = (await redis.info("memory"))["used_memory"]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def hit(i: int):
+        client = i % args.keys
+        async with semaphore:
+            await limiter.check(f"10.0.{client // 256}.{client % 256}", "bench", args.limit, args.window, algorithm)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(hit(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    keys = [key async for key in redis.scan_iter("rate_limiter:*")]
+    key_bytes = 0
+    for key in keys:
+        key_bytes += await redis.memory_usage(key) or 0
+    memory_after = (await redis.info("memory"))["used_memory"]
+
+    print(
+        f"{algorithm:<16} {args.requests / elapsed:10.0f} ops/s  "
+        f"keys={len(keys):<6} {key_bytes / max(1, args.keys):10.0f} B/client  "
+        f"used_memory +{(memory_after - memory_before) / 1024:.0f} KiB"
+    )
+
+
+async def main(args: argparse.Namespace):
+    redis = Redis(host=args.host, port=args.port, db=args.db)
+    try:
+        print(
+            f"clients={args.keys} requests={args.requests} limit={args.limit}/{args.window}s "
+            f"concurrency={args.concurrency}"
+        )
+        for algorithm in ALGORITHMS:
+            await run_algorithm(redis, algorithm, args)
+        await redis.flushdb()
+    finally:
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк алгоритмов ограничения запросов")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--keys", type=int, default=200, help="Количество различных клиентов (IP)")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=10000)
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,121 @@
+# test.benchmarks.bench_request_logger
+"""
+Накладные расходы логгера запросов: прежний BaseHTTPMiddleware против ASGI middleware.
+Оба варианта решают о записи через один и тот же RequestLogger.should_log, поэтому
+при одинаковой доле выборки пишут одинаковое число записей (см. enqueued в выводе).
+Прогон с долей 1.0 сравнивает стоимость самой записи, с долей по умолчанию - реальную конфигурацию.
+
+Запросы подаются прямо в ASGI-приложение, без сети; логи пишутся во временный каталог:
+    python -m test.benchmarks.bench_request_logger --requests 20000 --body-size 2048 --sample-rates 1.0,0.0
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ["DB_DATA_DIR"] = tempfile.mkdtemp(prefix="bench_request_logger_")
+
+from fastapi import FastAPI, Request
+from backend.middleware.logger import BodyPreview, REQUEST_LOG_BODY_BYTES, RequestLogger, RequestLoggerMiddleware
+from backend.routes.logging_config import REQUEST_LOG_SUCCESS_SAMPLE_RATE
+
+
+def make_legacy_middleware(request_logger: RequestLogger):
+    async def legacy_log_request(request: Request, call_next):
+        """Реализация до изменений: BaseHTTPMiddleware, тело читается через request.body()."""
+        start_time = time.time()
+        body = BodyPreview(REQUEST_LOG_BODY_BYTES)
+        body.feed(await request.body())
+        response = await call_next(request)
+        latency_ms = (time.time() - start_time) * 1000
+        # Та же выборка, что у ASGI middleware: сравниваются одинаковые объёмы записи
+        if request_logger.should_log(request.url.path, response.status_code, latency_ms):
+            request_logger.log({
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "latency_ms": latency_ms,
+                "ip": request.client.host,
+                "content_type": request.headers.get("content-type", ""),
+                "request_bytes": body.size,
+                "response_bytes": None,
+                "request_body": body,
+                "streaming": False,
+            })
+        return response
+
+    return legacy_log_request
+
+
+def make_app(variant: str, request_logger: RequestLogger) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    if variant == "base_http":
+        app.middleware("http")(make_legacy_middleware(request_logger))
+    elif variant == "asgi":
+        app.add_middleware(RequestLoggerMiddleware, request_logger)
+    return app
+
+
+async def call(app: FastAPI, body: bytes):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/echo", "raw_path": b"/api/echo", "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80), "state": {},
+    }
+    await app(scope, receive, send)
+
+
+async def run_variant(variant: str, sample_rate: float, args: argparse.Namespace) -> tuple[float, dict]:
+    request_logger = RequestLogger(default_rate=sample_rate)
+    app = make_app(variant, request_logger)
+    body = b'{"data": "' + b"x" * args.body_size + b'"}'
+    for _ in range(min(1000, args.requests)):
+        await call(app, body)
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        await call(app, body)
+    per_request = (time.perf_counter() - start) / args.requests * 1_000_000
+
+    # Дописываем очередь, чтобы следующий вариант не делил с ней поток записи
+    request_logger.writer.stop()
+    for handler in request_logger.writer.handlers:
+        handler.close()
+    return per_request, request_logger.writer.stats()
+
+
+async def main(args: argparse.Namespace):
+    print(f"requests={args.requests} body={args.body_size} B")
+    for sample_rate in args.sample_rates:
+        print(f"success sample rate {sample_rate}")
+        baseline, _ = await run_variant("none", sample_rate, args)
+        print(f"  {'none':<10} {baseline:8.1f} us/request")
+        for variant in ("base_http", "asgi"):
+            per_request, stats = await run_variant(variant, sample_rate, args)
+            print(f"  {variant:<10} {per_request:8.1f} us/request  overhead +{per_request - baseline:.1f} us  "
+                  f"enqueued={stats['enqueued']} dropped={stats['dropped']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк накладных расходов логгера запросов")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--body-size", type=int, default=2048)
+    parser.add_argument("--sample-rates", type=lambda value: [float(rate) for rate in value.split(",")],
+                        default=[1.0, REQUEST_LOG_SUCCESS_SAMPLE_RATE],
+                        help="Доли выборки успешных запросов через запятую (по умолчанию 1.0 и текущая настройка)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+# test.benchmarks.bench_serialization
+"""
+Стоимость сериализации ответов /api/login и /api/create_user на один запрос.
+
+legacy повторяет прежний путь: модель из pydantic_model_creator (from_tortoise_orm),
+повторная валидация по response_model, jsonable_encoder и json.dumps.
+direct - model_construct и один проход pydantic-core в байты (model_response).
+PostgreSQL не нужен, Tortoise поднимается на SQLite в памяти:
+    python -m test.benchmarks.bench_serialization --iterations 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+from tortoise import Tortoise
+from tortoise.contrib.pydantic import pydantic_model_creator
+
+from backend.models.users import User
+from backend.models.users_roles import UserRole
+from backend.routes.user_modules.create_user import CreatedUser, CreateUserResponse
+from backend.routes.user_modules.login import LoginResponse, UserOut
+from backend.utils.responses import model_response
+
+LegacyUserOut = pydantic_model_creator(User, name="LegacyUserOut", include=("login", "role"))
+
+
+class LegacyLoginResponse(BaseModel):
+    user: LegacyUserOut
+    access_token: str
+    token_type: str = "bearer"
+    message: str = "Успешная авторизация"
+
+
+TOKEN = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + "x" * 120
+
+
+async def legacy_login(user: User) -> bytes:
+    response = LegacyLoginResponse(user=await LegacyUserOut.from_tortoise_orm(user), access_token=TOKEN)
+    # FastAPI: валидация по response_model, затем jsonable_encoder и JSONResponse
+    validated = LegacyLoginResponse.model_validate(response.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+async def direct_login(user: User) -> bytes:
+    return model_response(LoginResponse.model_construct(
+        user=UserOut.model_construct(login=user.login, role=user.role),
+        access_token=TOKEN,
+        token_type="bearer",
+        message="Успешная авторизация",
+    )).body
+
+
+async def legacy_create_user(result: dict) -> bytes:
+    # response_model=dict: jsonable_encoder + json.dumps
+    return JSONResponse(jsonable_encoder(result)).body
+
+
+async def orjson_create_user(result: dict) -> bytes:
+    return ORJSONResponse(jsonable_encoder(result)).body
+
+
+async def direct_create_user(result: dict) -> bytes:
+    return model_response(CreateUserResponse.model_construct(
+        status=result["status"],
+        user=CreatedUser.model_construct(**result["user"]),
+    )).body
+
+
+async def measure(name: str, func, arg, iterations: int):
+    expected = json.loads(await func(arg))
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await func(arg)
+    per_call = (time.perf_counter() - start) / iterations * 1_000_000
+    print(f"{name:<22} {per_call:8.2f} us/request  {len(json.dumps(expected))} B")
+
+
+async def main(args: argparse.Namespace):
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"users": ["backend.models.users"]})
+    user = User(id=1, login="bench_user", role=UserRole("user"), hashed_password="$2b$12$" + "x" * 53)
+    created = {"status": "created", "user": {"login": "bench_user", "role": UserRole("user")}}
+
+    print(f"iterations={args.iterations}")
+    await measure("login legacy", legacy_login, user, args.iterations)
+    await measure("login direct", direct_login, user, args.iterations)
+    await measure("create_user legacy", legacy_create_user, created, args.iterations)
+    await measure("create_user orjson", orjson_create_user, created, args.iterations)
+    await measure("create_user direct", direct_create_user, created, args.iterations)
+    await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк сериализации ответов авторизации")
+    parser.add_argument("--iterations", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+# test.core.db_router
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+import pytest
+from tortoise.backends.base.client import TransactionalDBClient
+from backend.core import db_router
+from backend.core.db_router import ReplicaRouter, configure_replicas, primary_reads
+
+MODEL = SimpleNamespace(_meta=SimpleNamespace(default_connection="users_connection"))
+REPLICAS = ["users_connection_replica_0", "users_connection_replica_1"]
+
+
+@pytest.fixture
+def router():
+    configure_replicas({"users_connection": REPLICAS})
+    # Обычное соединение, не транзакция
+    with mock.patch("backend.core.db_router.connections.get", return_value=object()):
+        yield ReplicaRouter()
+    configure_replicas({})
+
+
+def set_healthy(*names: str):
+    replica_set = db_router._replica_sets["users_connection"]
+    for name in REPLICAS:
+        replica_set.set_health(name, name in names)
+
+
+def test_reads_rotate_over_healthy_replicas(router):
+    set_healthy(*REPLICAS)
+    assert [router.db_for_read(MODEL) for _ in range(4)] == REPLICAS * 2
+
+    set_healthy(REPLICAS[1])
+    assert [router.db_for_read(MODEL) for _ in range(2)] == [REPLICAS[1]] * 2
+    assert router.db_for_write(MODEL) is None
+
+
+def test_reads_fall_back_to_primary_when_replicas_are_down(router):
+    # До первой проверки реплики считаются недоступными
+    assert router.db_for_read(MODEL) is None
+    set_healthy(*REPLICAS)
+    set_healthy()
+    assert router.db_for_read(MODEL) is None
+
+
+def test_reads_pinned_to_primary(router):
+    set_healthy(*REPLICAS)
+
+    with primary_reads():
+        assert router.db_for_read(MODEL) is None
+    assert router.db_for_read(MODEL) in REPLICAS
+
+    transaction = mock.Mock(spec=TransactionalDBClient)
+    with mock.patch("backend.core.db_router.connections.get", return_value=transaction):
+        assert router.db_for_read(MODEL) is None
+
+
+def test_shared_write_marker_is_seen_by_other_workers(router):
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis()
+
+    async def run():
+        await db_router.remember_write("users:alice")
+        # Другой воркер: локальных отметок нет
+        db_router._recent_writes.clear()
+        return (await db_router.written_recently_shared("users:alice"),
+                await db_router.written_recently_shared("users:bob"))
+
+    with mock.patch("backend.core.db_router.get_redis", return_value=redis), \
+            mock.patch("backend.core.db_router.redis_pipeline", side_effect=lambda: redis.pipeline(transaction=False)):
+        assert asyncio.run(run()) == (True, False)
@@ -0,0 +1,58 @@
+# test.middleware.compression
+import asyncio
+import gzip
+import zlib
+from backend.middleware.compression import CompressionMiddleware
+
+
+def run_response(chunks: list[bytes], headers: list | None = None, accept_encoding: bytes = b"gzip"):
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": headers or [(b"content-type", b"application/json")]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/x",
+             "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, receive, send))
+    return dict(sent[0]["headers"]), sent[1:]
+
+
+def test_single_body_compressed_with_length():
+    body = b'{"detail": "' + b"x" * 2000 + b'"}'
+    headers, messages = run_response([body])
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert int(headers[b"content-length"]) == len(messages[0]["body"])
+    assert gzip.decompress(messages[0]["body"]) == body
+
+
+def test_small_or_excluded_or_encoded_bodies_pass_through():
+    assert b"content-encoding" not in run_response([b"{}"])[0]
+    assert b"content-encoding" not in run_response([b"x" * 2000], [(b"content-type", b"image/png")])[0]
+    assert b"content-encoding" not in run_response([b"x" * 2000], accept_encoding=b"gzip;q=0")[0]
+    headers, messages = run_response([b"x" * 2000], [(b"content-encoding", b"br")])
+    assert headers[b"content-encoding"] == b"br"
+    assert messages[0]["body"] == b"x" * 2000
+
+
+def test_streaming_chunks_flushed_incrementally():
+    chunks = [b"a" * 500, b"b" * 500, b"c" * 500]
+    headers, messages = run_response(chunks)
+
+    assert b"content-length" not in headers
+    assert len(messages) == 3
+    decompressor = zlib.decompressobj(31)
+    # Каждый фрагмент распаковывается сразу, до конца потока
+    for chunk, message in zip(chunks, messages):
+        assert decompressor.decompress(message["body"]) == chunk
+    assert messages[-1]["more_body"] is False
@@ -0,0 +1,97 @@
+# test.middleware.logger
+import asyncio
+from backend.middleware.logger import RequestLogger, RequestLoggerMiddleware
+
+
+class StubWriter:
+    def __init__(self):
+        self.records = []
+
+    def enqueue(self, record) -> bool:
+        self.records.append(record)
+        return True
+
+
+class StubRequestLogger:
+    slow_ms = 0
+
+    def __init__(self):
+        self.records = []
+
+    def should_log(self, route_path: str, status_code: int, latency_ms: float) -> bool:
+        return True
+
+    def log(self, fields: dict):
+        self.records.append(fields)
+
+
+def run_request(content_type: bytes, chunks: list[bytes], body_bytes: int = 10):
+    received, sent = [], []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message["body"])
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"part", "more_body": True})
+        await send({"type": "http.response.body", "body": b"end"})
+
+    messages = iter([{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+                     for i, c in enumerate(chunks)])
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/api/x", "client": ("10.0.0.1", 1234),
+             "headers": [(b"content-type", content_type)]}
+    request_logger = StubRequestLogger()
+    asyncio.run(RequestLoggerMiddleware(app, request_logger, body_bytes)(scope, receive, send))
+    return request_logger.records[0], received, sent
+
+
+def test_logger_records_response_and_bounded_body():
+    chunks = [b"a" * 8, b"b" * 8, b"c" * 1000]
+    fields, received, sent = run_request(b"application/json", chunks)
+
+    assert received == chunks
+    assert len(sent) == 3
+    assert fields["status"] == 201
+    assert fields["response_bytes"] == 7
+    assert fields["streaming"] is True
+    assert fields["ip"] == "10.0.0.1"
+    assert fields["request_bytes"] == 1016
+    assert len(fields["request_body"].data) == 10
+    assert str(fields["request_body"]) == "aaaaaaaabb...<truncated>"
+
+
+def test_logger_skips_binary_body():
+    fields, received, _ = run_request(b"multipart/form-data; boundary=x", [b"payload"])
+
+    assert received == [b"payload"]
+    assert fields["request_body"] == "<binary body not captured>"
+
+
+def test_sampling_by_route_template_and_latency():
+    request_logger = RequestLogger(sample_rates={"/api/users/{user_id}": 1.0}, default_rate=0.0,
+                                   slow_ms=500, writer=StubWriter())
+
+    assert request_logger.should_log("/api/users/{user_id}", 200, 1)
+    assert not request_logger.should_log("/api/login", 200, 1)
+    # Медленные и ошибочные запросы логируются независимо от выборки
+    assert request_logger.should_log("/api/login", 200, 800)
+    assert request_logger.should_log("/api/login", 401, 1)
+    assert not request_logger.should_log("/api/login", 304, 1)
+
+
+def test_request_logger_enqueues_record_with_status():
+    writer = StubWriter()
+    request_logger = RequestLogger(writer=writer)
+
+    request_logger.log({"status": 404, "path": "/api/x"})
+
+    assert [(record.status_code, record.request["path"]) for record in writer.records] == [(404, "/api/x")]
@@ -0,0 +1,54 @@
+# test.middleware.rate_limit
+import pytest
+from backend.middleware.rate_limit import PolicyTable, _composite_headers
+from backend.utils.rate_limiter import CompositeRateLimitResult
+
+POLICIES = [
+    {"name": "api", "match": "prefix", "path": "/api/", "max_requests": 100, "window_seconds": 60},
+    {"name": "users", "match": "prefix", "path": "/api/users/", "max_requests": 50, "window_seconds": 60},
+    {"name": "login", "match": "exact", "path": "/api/login", "methods": ["post"],
+     "max_requests": 5, "window_seconds": 60, "algorithm": "gcra"},
+    {"name": "by_id", "match": "regex", "path": r"^/items/\d+$", "max_requests": 10, "window_seconds": 1},
+    {"name": "health", "match": "exact", "path": "/api/health", "exempt": True},
+]
+
+
+def test_policy_table_priority():
+    table = PolicyTable(POLICIES)
+
+    assert table.match("POST", "/api/login").name == "login"
+    # Для другого метода точная политика не подходит, срабатывает префикс
+    assert table.match("GET", "/api/login").name == "api"
+    assert table.match("GET", "/api/users/1").name == "users"
+    assert table.match("GET", "/items/42").name == "by_id"
+    assert table.match("GET", "/items/abc") is None
+    assert table.match("GET", "/api/health").exempt
+
+
+def test_policy_table_rejects_unknown_algorithm():
+    with pytest.raises(ValueError):
+        PolicyTable([{"path": "/api/", "match": "prefix", "max_requests": 1,
+                      "window_seconds": 1, "algorithm": "token_bucket"}])
+
+
+def test_policy_table_composite_limits():
+    table = PolicyTable([{"name": "api", "match": "prefix", "path": "/api/",
+                          "limits": {"user": [300, 60], "ip": [100, 60], "global": [5000, 1]}}])
+    policy = table.match("GET", "/api/users")
+
+    assert policy.limits == {"user": (300, 60), "ip": (100, 60), "global": (5000, 1)}
+    assert (policy.max_requests, policy.window_seconds) == (100, 60)
+
+    with pytest.raises(ValueError):
+        PolicyTable([{"path": "/api/", "match": "prefix", "limits": {"tenant": [1, 1]}}])
+
+
+def test_composite_headers_omitted_when_no_dimension_applies():
+    table = PolicyTable([{"name": "users", "match": "prefix", "path": "/api/", "limits": {"user": [300, 60]}}])
+    policy = table.match("GET", "/api/users")
+
+    # Анонимный запрос: измерение user не проверялось
+    assert _composite_headers(policy, CompositeRateLimitResult(False, None, {}, 0)) == []
+    headers = dict(_composite_headers(policy, CompositeRateLimitResult(False, None, {"user": 299}, 0)))
+    assert headers[b"ratelimit-policy"] == b'300;w=60;comment="user"'
+    assert headers[b"ratelimit-remaining"] == b"299"
@@ -0,0 +1,37 @@
+# test.utils.circuit_breaker
+from unittest import mock
+from backend.utils.circuit_breaker import CircuitBreaker
+
+
+def make_breaker():
+    return CircuitBreaker("test", failure_threshold=2, base_delay_seconds=1, max_delay_seconds=4)
+
+
+def test_circuit_opens_after_threshold():
+    breaker = make_breaker()
+    with mock.patch("backend.utils.circuit_breaker.time.monotonic", return_value=100.0):
+        breaker.record_failure()
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+
+def test_half_open_allows_single_probe_and_backs_off():
+    breaker = make_breaker()
+    with mock.patch("backend.utils.circuit_breaker.time.monotonic", return_value=100.0):
+        breaker.record_failure()
+        breaker.record_failure()
+
+    with mock.patch("backend.utils.circuit_breaker.time.monotonic", return_value=101.0):
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_failure()
+        # Неудачная проба удваивает паузу
+        assert breaker.retry_after_seconds() == 2
+
+    with mock.patch("backend.utils.circuit_breaker.time.monotonic", return_value=103.0):
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
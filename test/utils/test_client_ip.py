@@ -0,0 +1,23 @@
+# test.utils.client_ip
+from backend.utils.client_ip import parse_networks, resolve_client_ip, scope_client_ip
+
+TRUSTED = parse_networks("10.0.0.0/8, 192.168.1.5, not-an-ip")
+
+
+def test_forwarded_for_ignored_without_trusted_proxy():
+    assert resolve_client_ip("203.0.113.7", "1.2.3.4", TRUSTED) == "203.0.113.7"
+    assert resolve_client_ip("10.0.0.2", "1.2.3.4", ()) == "10.0.0.2"
+    assert resolve_client_ip(None, "1.2.3.4", TRUSTED) == "unknown"
+
+
+def test_forwarded_for_walks_past_trusted_hops():
+    # Клиент подставил свой X-Forwarded-For, прокси дописали реальный адрес и себя
+    assert resolve_client_ip("10.0.0.2", "6.6.6.6, 198.51.100.9, 192.168.1.5", TRUSTED) == "198.51.100.9"
+    assert resolve_client_ip("10.0.0.2", "10.1.1.1", TRUSTED) == "10.1.1.1"
+    assert resolve_client_ip("10.0.0.2", "", TRUSTED) == "10.0.0.2"
+
+
+def test_scope_client_ip_without_trusted_proxies():
+    scope = {"client": ("10.0.0.2", 1234), "headers": [(b"x-forwarded-for", b"1.2.3.4")]}
+
+    assert scope_client_ip(scope) == "10.0.0.2"
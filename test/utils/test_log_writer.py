@@ -0,0 +1,61 @@
+# test.utils.log_writer
+import logging
+from backend.utils.log_writer import BatchFileHandler, QueuedLogWriter
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 0, message, None, None)
+
+
+def test_drop_policy_counts_dropped_records(tmp_path):
+    writer = QueuedLogWriter("test_drop", [BatchFileHandler(tmp_path / "drop.log")], max_size=2)
+
+    # Поток не запущен, поэтому очередь заполняется
+    assert [writer.enqueue(make_record(str(i))) for i in range(3)] == [True, True, False]
+    assert writer.stats()["dropped"] == 1
+    writer.handlers[0].close()
+
+
+def test_writer_flushes_queue_on_stop(tmp_path):
+    handler = BatchFileHandler(tmp_path / "out.log")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    writer = QueuedLogWriter("test_flush", [handler], batch_size=10)
+    writer.start()
+
+    for i in range(25):
+        writer.enqueue(make_record(f"line {i}"))
+    writer.stop()
+    handler.close()
+
+    assert (tmp_path / "out.log").read_text(encoding="utf-8").splitlines() == [f"line {i}" for i in range(25)]
+    assert writer.stats()["written"] == 25
+
+
+def test_handler_rotates_by_size_and_keeps_backups(tmp_path):
+    handler = BatchFileHandler(tmp_path / "app.log", max_bytes=100, backup_count=2, compress=False)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    for i in range(5):
+        handler.emit_batch([make_record("x" * 60)])
+    handler.close()
+
+    rotated = [path for path in tmp_path.iterdir() if path.name != "app.log"]
+    assert len(rotated) == 2
+    assert (tmp_path / "app.log").stat().st_size < 100
+
+
+def test_stopped_writer_restarts_on_next_record(tmp_path):
+    handler = BatchFileHandler(tmp_path / "restart.log")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    writer = QueuedLogWriter("test_restart", [handler])
+    writer.start()
+    writer.enqueue(make_record("first"))
+    # Как при завершении lifespan: поток остановлен, файл закрыт
+    writer.stop()
+    handler.close()
+
+    writer.enqueue(make_record("second"))
+    writer.stop()
+    handler.close()
+
+    assert (tmp_path / "restart.log").read_text(encoding="utf-8").splitlines() == ["first", "second"]
@@ -0,0 +1,69 @@
+# test.utils.login_throttle
+import asyncio
+from unittest import mock
+import pytest
+from redis.exceptions import ConnectionError
+from backend.utils.circuit_breaker import CircuitBreaker
+from backend.utils.login_throttle import LoginThrottle
+
+
+class BrokenRedis:
+    def __init__(self):
+        self.calls = 0
+
+    async def script_load(self, script: str):
+        self.calls += 1
+        raise ConnectionError("Redis is down")
+
+
+@pytest.fixture(autouse=True)
+def default_policy():
+    with mock.patch.multiple("backend.utils.login_throttle", LOGIN_THROTTLE_LOGIN_THRESHOLD=5,
+                             LOGIN_THROTTLE_IP_THRESHOLD=50, LOGIN_THROTTLE_BASE_DELAY_MS=1000):
+        yield
+
+
+def make_throttle() -> LoginThrottle:
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return LoginThrottle(fakeredis.FakeAsyncRedis())
+
+
+def test_lockout_doubles_after_threshold():
+    throttle = make_throttle()
+
+    async def run():
+        delays = [await throttle.record_failure("alice", "10.0.0.1") for _ in range(7)]
+        return delays, await throttle.retry_after_ms("alice", "10.0.0.2")
+
+    delays, retry_after_ms = asyncio.run(run())
+    # Порог 5 попыток, первая блокировка 1 секунда
+    assert delays == [0, 0, 0, 0, 1000, 2000, 4000]
+    assert 0 < retry_after_ms <= 4000
+
+
+def test_success_resets_login_counter():
+    throttle = make_throttle()
+
+    async def run():
+        for _ in range(5):
+            await throttle.record_failure("alice", "10.0.0.1")
+        await throttle.record_success("alice", "10.0.0.1")
+        return await throttle.retry_after_ms("alice", "10.0.0.1"), await throttle.record_failure("alice", "10.0.0.1")
+
+    # Блокировка снята, отсчёт неудач по логину начинается заново
+    assert asyncio.run(run()) == (0, 0)
+
+
+def test_fails_open_when_redis_is_down():
+    redis = BrokenRedis()
+    throttle = LoginThrottle(redis, CircuitBreaker("test", failure_threshold=1, base_delay_seconds=60))
+
+    async def run():
+        return (await throttle.record_failure("alice", "10.0.0.1"),
+                await throttle.retry_after_ms("alice", "10.0.0.1"),
+                await throttle.record_success("alice", "10.0.0.1"))
+
+    assert asyncio.run(run()) == (0, 0, None)
+    # После первого сбоя цепь разомкнута: Redis больше не вызывается
+    assert redis.calls == 1
@@ -0,0 +1,68 @@
+# test.utils.metrics
+import asyncio
+import json
+import os
+from unittest import mock
+import pytest
+from fastapi import HTTPException, Request
+from backend.routes.metrics import metrics_access
+from backend.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry, merge_snapshots, render_text
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.5, 0.5, 3):
+        latency.labels("/api/users/{user_id}").observe(value)
+
+    text = render_text(registry.snapshot())
+
+    assert 'latency_seconds_bucket{route="/api/users/{user_id}",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/api/users/{user_id}",le="1"} 3' in text
+    assert 'latency_seconds_bucket{route="/api/users/{user_id}",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/api/users/{user_id}"} 4' in text
+
+
+def test_merge_sums_workers_and_drops_gauges_of_dead_ones():
+    registry = MetricsRegistry()
+    requests = Counter("requests_total", "Requests", ("status",), registry=registry)
+    in_flight = Gauge("in_flight", "In flight", registry=registry)
+    requests.labels(200).inc(3)
+    in_flight.set(2)
+    snapshot = registry.snapshot()
+
+    dead_pid = 2 ** 22 + 1
+    merged = merge_snapshots([
+        {"pid": os.getpid(), "metrics": snapshot},
+        {"pid": os.getpid(), "metrics": snapshot},
+        {"pid": dead_pid, "metrics": snapshot},
+    ])
+
+    assert merged["requests_total"]["samples"] == [[["200"], 9.0]]
+    assert merged["in_flight"]["samples"] == [[[], 4.0]]
+
+
+def test_render_async_merges_worker_files_off_the_loop(tmp_path):
+    registry = MetricsRegistry()
+    requests = Counter("requests_total", "Requests", registry=registry)
+    requests.inc(2)
+    # Снапшот другого (уже завершившегося) воркера: его счётчики остаются в сумме
+    (tmp_path / "1.json").write_text(json.dumps({"pid": 1, "metrics": registry.snapshot()}))
+
+    with mock.patch("backend.utils.metrics.METRICS_MULTIPROC_DIR", str(tmp_path)), \
+            mock.patch("backend.utils.metrics.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+        text = asyncio.run(registry.render_async())
+
+    assert to_thread.called
+    assert "requests_total 4" in text
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+def test_metrics_allowed_only_from_configured_networks():
+    def request(ip: str) -> Request:
+        return Request({"type": "http", "client": (ip, 1234), "headers": []})
+
+    asyncio.run(metrics_access(request("127.0.0.1")))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(metrics_access(request("203.0.113.7")))
+    assert error.value.status_code == 403
@@ -0,0 +1,133 @@
+# test.utils.rate_limiter
+import asyncio
+from unittest import mock
+import pytest
+from redis.exceptions import ConnectionError
+from backend.utils.circuit_breaker import CircuitBreaker
+from backend.utils.rate_limiter import HybridRateLimiter, LimitSpec, RateLimiter
+
+# Середина 60-секундного окна: sliding_window считает долю предыдущего окна от этой точки
+NOW = 600_030.0
+
+
+class StubLeaseLimiter(HybridRateLimiter):
+    """Квота выдаётся без Redis: каждая партия - 10 запросов."""
+
+    async def _lease(self, key: str, max_requests: int, batch: int, ttl_ms: int) -> tuple[int, int, int]:
+        return 10, 0, 0
+
+
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    # Lua-скрипты лимитеров выполняются через lupa
+    pytest.importorskip("lupa")
+    return fakeredis.FakeAsyncRedis()
+
+
+def run_checks(limiter: RateLimiter, algorithm: str, count: int, at: float = NOW, ip: str = "1.2.3.4"):
+    async def run():
+        return [await limiter.check(ip, "test", 3, 60, algorithm) for _ in range(count)]
+
+    with mock.patch("backend.utils.rate_limiter.time.time", return_value=at):
+        return [(result.limited, result.remaining, result.retry_after_ms) for result in asyncio.run(run())]
+
+
+def test_sliding_log_limit_and_retry_after():
+    limiter = RateLimiter(fake_redis())
+
+    assert run_checks(limiter, "sliding_log", 4) == [(False, 2, 0), (False, 1, 0), (False, 0, 0), (True, 0, 60000)]
+    # Самая старая запись освободит место через оставшиеся 50 секунд
+    assert run_checks(limiter, "sliding_log", 1, NOW + 10) == [(True, 0, 50000)]
+    # Все три записи вышли из окна
+    assert run_checks(limiter, "sliding_log", 1, NOW + 60) == [(False, 2, 0)]
+
+
+def test_sliding_window_weights_previous_window():
+    limiter = RateLimiter(fake_redis())
+
+    assert run_checks(limiter, "sliding_window", 4) == [(False, 2, 0), (False, 1, 0), (False, 0, 0), (True, 0, 30000)]
+    # Следующее окно, прошла его половина: из предыдущего учитывается 3 * 0.5
+    assert run_checks(limiter, "sliding_window", 2, NOW + 60) == [(False, 0, 0), (True, 0, 10000)]
+    assert run_checks(limiter, "sliding_window", 1, NOW + 70) == [(False, 0, 0)]
+
+
+def test_gcra_spreads_requests_over_window():
+    limiter = RateLimiter(fake_redis())
+
+    # Интервал 20 секунд, всплеск до 3 запросов
+    assert run_checks(limiter, "gcra", 4) == [(False, 2, 0), (False, 1, 0), (False, 0, 0), (True, 0, 20000)]
+    assert run_checks(limiter, "gcra", 2, NOW + 20) == [(False, 0, 0), (True, 0, 20000)]
+
+
+def test_algorithms_count_clients_separately():
+    limiter = RateLimiter(fake_redis())
+
+    for algorithm in ("sliding_log", "sliding_window", "gcra"):
+        assert run_checks(limiter, algorithm, 4, ip="10.0.0.1")[-1][0]
+        assert run_checks(limiter, algorithm, 1, ip="10.0.0.2") == [(False, 2, 0)]
+
+
+class BrokenRedis:
+    def __init__(self):
+        self.calls = 0
+
+    async def script_load(self, script: str):
+        self.calls += 1
+        raise ConnectionError("Redis is down")
+
+
+def run_check_many(limiter: RateLimiter, limits: list[LimitSpec], at: float = NOW):
+    with mock.patch("backend.utils.rate_limiter.time.time", return_value=at):
+        result = asyncio.run(limiter.check_many(limits))
+    return result.limited, result.tripped, result.remaining, result.retry_after_ms
+
+
+def test_check_many_tripped_dimension_consumes_nothing():
+    limiter = RateLimiter(fake_redis())
+    ip_a = [LimitSpec("ip", "test:ip:a", 1, 60), LimitSpec("route", "test:route", 10, 60)]
+    ip_b = [LimitSpec("ip", "test:ip:b", 1, 60), LimitSpec("route", "test:route", 10, 60)]
+
+    assert run_check_many(limiter, ip_a) == (False, None, {"ip": 0, "route": 9}, 0)
+    # Лимит ip превышен: маршрут не списывается
+    assert run_check_many(limiter, ip_a) == (True, "ip", {"ip": 0, "route": 9}, 60000)
+    assert run_check_many(limiter, ip_a) == (True, "ip", {"ip": 0, "route": 9}, 60000)
+    assert run_check_many(limiter, ip_b) == (False, None, {"ip": 0, "route": 8}, 0)
+
+
+def test_check_many_falls_back_to_local_limits_when_breaker_is_open():
+    redis = BrokenRedis()
+    limiter = RateLimiter(redis, CircuitBreaker("test", failure_threshold=1, base_delay_seconds=60))
+    limits = [LimitSpec("ip", "test:ip:a", 2, 60), LimitSpec("global", "global", 100, 60)]
+
+    with mock.patch("backend.utils.rate_limiter.FAILURE_MODE", "local"):
+        results = [run_check_many(limiter, limits) for _ in range(3)]
+
+    # Первый сбой размыкает цепь, дальше Redis не вызывается
+    assert redis.calls == 1
+    assert [result[:2] for result in results] == [(False, None), (False, None), (True, "ip")]
+    assert set(results[2][2]) == {"ip", "global"} and results[2][3] > 0
+
+
+def test_hybrid_leases_are_bounded_by_lru():
+    limiter = StubLeaseLimiter(redis=None, max_keys=3)
+
+    async def run():
+        # Все ключи в одном окне: вытеснять по окну нечего
+        for ip in ["a", "b", "c", "a", "d", "e"]:
+            assert not (await limiter.check(ip, "test", 100, 60)).limited
+
+    asyncio.run(run())
+    assert list(limiter._leases) == ["rate_limiter:test:a", "rate_limiter:test:d", "rate_limiter:test:e"]
+
+
+def test_hybrid_remaining_reports_window_budget():
+    limiter = HybridRateLimiter(fake_redis(), error_bound=0.2)
+
+    async def run():
+        return [await limiter.check("1.2.3.4", "test", 10, 60) for _ in range(11)]
+
+    results = asyncio.run(run())
+    # Партии по 2 запроса, но остаток считается от лимита окна, а не от партии
+    assert [result.remaining for result in results[:10]] == [9, 8, 7, 6, 5, 4, 3, 2, 1, 0]
+    assert not any(result.limited for result in results[:10])
+    assert results[10].limited and results[10].retry_after_ms > 0
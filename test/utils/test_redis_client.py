@@ -0,0 +1,28 @@
+# test.utils.redis_client
+import asyncio
+
+from backend.utils.redis_client import CountingConnectionPool
+
+
+def test_pool_counts_leased_and_idle_connections():
+    pool = CountingConnectionPool(max_connections=5)
+    assert pool.counts() == (0, 0)
+
+    # Соединения не открываются: считаются только выдача и возврат
+    first = pool.get_available_connection()
+    second = pool.get_available_connection()
+    assert pool.counts() == (2, 0)
+
+    asyncio.run(pool.release(first))
+    assert pool.counts() == (1, 1)
+
+    # Свободное соединение переиспользуется, новое не создаётся
+    assert pool.get_available_connection() is first
+    assert pool.counts() == (2, 0)
+
+    asyncio.run(pool.release(first))
+    asyncio.run(pool.release(second))
+    assert pool.counts() == (0, 2)
+
+    pool.reset()
+    assert pool.counts() == (0, 0)
@@ -0,0 +1,32 @@
+# test.utils.static_cache
+from types import SimpleNamespace
+from backend.utils.static_cache import CachedAsset
+
+BODY = b"<html>" + b"documentation " * 200 + b"</html>"
+
+
+def make_request(**headers):
+    return SimpleNamespace(headers=headers)
+
+
+def test_asset_serves_gzip_variant_with_strong_etag():
+    asset = CachedAsset(BODY, "text/html; charset=utf-8")
+    response = asset.response(make_request(**{"accept-encoding": "gzip, deflate"}))
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].startswith('"') and not response.headers["etag"].startswith("W/")
+    assert len(response.body) < len(BODY)
+
+    identity = asset.response(make_request(**{"accept-encoding": "gzip;q=0"}))
+    assert "content-encoding" not in identity.headers
+    assert identity.body == BODY
+
+
+def test_asset_answers_if_none_match_with_304():
+    asset = CachedAsset(BODY, "text/html; charset=utf-8")
+    etag = asset.response(make_request()).headers["etag"]
+
+    response = asset.response(make_request(**{"if-none-match": f'W/"other", {etag}'}))
+
+    assert response.status_code == 304
+    assert response.body == b""
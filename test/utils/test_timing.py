@@ -0,0 +1,24 @@
+# test.utils.timing
+from backend.utils.timing import end_request_timing, server_timing_header, span, start_request_timing
+
+
+def test_spans_outside_request_are_noop():
+    with span("db"):
+        pass
+
+
+def test_spans_are_collected_per_request():
+    spans, token = start_request_timing()
+    try:
+        for _ in range(2):
+            with span("db"):
+                pass
+        with span("bcrypt"):
+            pass
+    finally:
+        end_request_timing(token)
+
+    assert spans["db"][1] == 2 and spans["bcrypt"][1] == 1
+    header = server_timing_header(spans, 12.5)
+    assert header.startswith("db;dur=") and 'desc="2 calls"' in header
+    assert header.endswith("total;dur=12.50")
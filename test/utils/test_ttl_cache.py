@@ -0,0 +1,35 @@
+# test.utils.ttl_cache
+from unittest import mock
+from backend.utils.ttl_cache import TTLCache, MISSING
+
+
+def test_ttl_cache_hit_and_miss():
+    cache = TTLCache(max_size=10, ttl_seconds=60)
+    assert cache.get("user") is MISSING
+
+    cache.set("user", None)  # отрицательная запись
+    assert cache.get("user") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_cache_expiration():
+    cache = TTLCache(max_size=10, ttl_seconds=60)
+    with mock.patch("backend.utils.ttl_cache.time.monotonic", return_value=100.0):
+        cache.set("user", 1, ttl_seconds=5)
+    with mock.patch("backend.utils.ttl_cache.time.monotonic", return_value=104.0):
+        assert cache.get("user") == 1
+    with mock.patch("backend.utils.ttl_cache.time.monotonic", return_value=105.0):
+        assert cache.get("user") is MISSING
+    assert len(cache) == 0
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.peek("b") is MISSING
+    assert cache.peek("a") == 1
+    assert cache.evictions == 1